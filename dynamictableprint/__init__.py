@@ -5,3 +5,10 @@ Dynamic Table Print
 from .dynamicprinter import *
 from .utils import *
 from .squisher import *
+from .grid import *
+from .writer import *
+from .cache import *
+from .handlers import *
+from .planner import *
+from .persistent import *
+from .table import *
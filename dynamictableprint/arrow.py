@@ -0,0 +1,158 @@
+"""
+Optional Apache Arrow backend
+
+When pyarrow is importable, Arrow-backed string columns (pandas
+string[pyarrow] columns, or pyarrow arrays) are measured and truncated
+with Arrow compute kernels instead of one Python str per cell
+"""
+
+import sys
+
+import numpy as np
+
+pa = None
+pc = None
+
+def load():
+    """
+    pyarrow, or None. It is only imported once something else has
+    imported it, since until then no values can be Arrow-backed
+    """
+    global pa, pc # pylint: disable=global-statement,invalid-name
+    if pa is None and 'pyarrow' in sys.modules:
+        try:
+            import pyarrow
+            import pyarrow.compute
+        except ImportError:
+            return None
+
+        pa, pc = pyarrow, pyarrow.compute
+
+    return pa
+
+def available():
+    """
+    True when pyarrow can be imported
+    """
+    try:
+        import pyarrow # pylint: disable=unused-import
+    except ImportError:
+        return False
+
+    return True
+
+def arrow_array(values):
+    """
+    The pyarrow Array or ChunkedArray values are held in, without
+    copying, or None when they are not Arrow-backed
+    """
+    if load() is None:
+        return None
+
+    values = getattr(values, 'array', values)
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        return values
+
+    if getattr(getattr(values, 'dtype', None), 'storage', None) == 'pyarrow':
+        return values.__arrow_array__()
+
+    return None
+
+def string_array(values):
+    """
+    arrow_array, but only for Arrow-backed strings
+    """
+    array = arrow_array(values)
+    if array is None or not (pa.types.is_string(array.type)
+                             or pa.types.is_large_string(array.type)):
+        return None
+
+    return array
+
+def arrow_strings(values):
+    """
+    The values as an Arrow string array, with nulls filled in with the
+    text str() would have given them
+
+    Returns None when the values are not Arrow-backed strings, so the
+    caller falls back to the pure Python path
+    """
+    array = string_array(values)
+    if array is None:
+        return None
+
+    if array.null_count:
+        dtype = getattr(getattr(values, 'array', values), 'dtype', None)
+        array = pc.fill_null(array, str(getattr(dtype, 'na_value', None)))
+
+    return array
+
+def max_width(values):
+    """
+    The width of the widest value, or None if the Arrow backend
+    does not apply
+    """
+    array = arrow_strings(values)
+    if array is None or len(array) == 0:
+        return None
+
+    return pc.max(pc.utf8_length(array)).as_py()
+
+class ArrowColumn:
+    """
+    A squished column left in Arrow. Slicing it packs just those rows
+    into a fixed-width unicode array, so a SquishedGrid only turns the
+    rows it renders into Python strings, a block at a time
+    """
+
+    def __init__(self, array, width):
+        self.array = array
+        self.dtype = np.dtype('<U%d' % max(int(width), 1))
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return np.asarray(
+                self.array[index].to_numpy(zero_copy_only=False),
+                dtype=self.dtype)
+
+        return self.array[index].as_py()
+
+    @property
+    def nbytes(self):
+        """
+        Size of the Arrow buffers
+        """
+        return self.array.nbytes
+
+    def tolist(self):
+        """
+        Every value, as a list of str
+        """
+        return self[:].tolist()
+
+def squish(values, ideal_length, ellipses):
+    """
+    Truncates every value longer than ideal_length, ending it with
+    ellipses, as an ArrowColumn of width ideal_length
+
+    Returns None if the Arrow backend does not apply
+    """
+    array = arrow_strings(values)
+    if array is None:
+        return None
+
+    too_long = pc.greater(pc.utf8_length(array), ideal_length)
+
+    keep = ideal_length - len(ellipses)
+    if keep > 0:
+        squished = pc.binary_join_element_wise(
+            pc.utf8_slice_codeunits(array, 0, keep),
+            pa.scalar(ellipses, type=array.type),
+            pa.scalar('', type=array.type))
+    else:
+        squished = pa.scalar(ellipses, type=array.type)
+
+    return ArrowColumn(pc.if_else(too_long, squished, array), ideal_length)
@@ -0,0 +1,263 @@
+"""
+A cache of the string work done on each column, so that columns which
+have not changed between re-renders are not stringified, measured or
+squished again
+"""
+
+import collections
+import hashlib
+import sys
+import threading
+
+import numpy as np
+
+from . import arrow
+from .grid import SquishedGrid
+from .utils import MEASURE_BLOCK_SIZE, max_column_width, printed_values
+
+# values stringified at a time when fingerprinting object columns
+HASH_BLOCK_SIZE = 4096
+
+def stringify(values):
+    """
+    The str() of every value, as an object array
+    """
+    return np.fromiter(map(str, printed_values(values)), dtype=object,
+                       count=len(values))
+
+def truncated(values, width):
+    """
+    The str() of every value cut to at most width characters, packed into
+    a unicode array of that width rather than of the longest value
+    """
+    return SquishedGrid.fixed_width(
+        list(map(str, printed_values(values))), width)
+
+def fingerprint(column):
+    """
+    A cheap key for the contents of a column: its dtype, its length and
+    a hash of its underlying buffers
+
+    Arrow-backed columns are hashed straight from their Arrow buffers.
+    Object columns have no meaningful buffer, so the text of their values
+    is hashed instead, a block at a time, each block's lengths first
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    array = arrow.arrow_array(column)
+    if array is not None:
+        for chunk in getattr(array, 'chunks', [array]):
+            digest.update(b'%d:%d;' % (chunk.offset, len(chunk)))
+            for buffer in chunk.buffers():
+                if buffer is not None:
+                    digest.update(buffer)
+    else:
+        values = np.asarray(getattr(column, 'values', column))
+        if values.dtype.kind == 'O':
+            for start in range(0, len(values), HASH_BLOCK_SIZE):
+                texts = [str(value).encode('utf-8', 'surrogatepass') for value
+                         in values[start:start + HASH_BLOCK_SIZE].tolist()]
+                digest.update(np.fromiter(map(len, texts), dtype=np.int64,
+                                          count=len(texts)).tobytes())
+                digest.update(b''.join(texts))
+        else:
+            digest.update(np.ascontiguousarray(values).view(np.uint8))
+
+    return (str(getattr(column, 'dtype', None)), len(column),
+            digest.hexdigest())
+
+class CachedColumn:
+    """
+    The string work for a single column, filled in as it is asked for
+
+    It holds only that work, not the column, so each method is given the
+    column's values. ColumnCache.column hands out a BoundColumn, which
+    passes them along
+    """
+
+    def __init__(self, cache, key):
+        self._cache = cache
+        self.key = key
+        self._strings = None
+        self._width = None
+        self._squished = {}
+        self.nbytes = 0
+
+    def strings(self, values):
+        """
+        The stringified values of the column
+        """
+        if self._strings is None:
+            self._strings = stringify(values)
+            self._cache._grew(self, self._strings.nbytes + sum(
+                map(sys.getsizeof, self._strings)))
+
+        return self._strings
+
+    def width(self, values, block_size=MEASURE_BLOCK_SIZE):
+        """
+        The width of the widest stringified value, measured block_size
+        values at a time
+        """
+        if self._width is None:
+            self._width = int(max_column_width(values, block_size))
+
+        return self._width
+
+    def squished(self, values, ideal_length, ellipses, squish):
+        """
+        The column squished to ideal_length by squish(values, ideal_length)
+        """
+        key = (ideal_length, ellipses)
+        if key not in self._squished:
+            squished = squish(values, ideal_length)
+            self._squished[key] = squished
+            self._cache._grew(self, squished.nbytes)
+
+        return self._squished[key]
+
+class BoundColumn:
+    """
+    A CachedColumn together with the column it was looked up for, which
+    it holds only for as long as the caller keeps it
+    """
+
+    def __init__(self, entry, values):
+        self.entry = entry
+        self.values = values
+
+    @property
+    def key(self):
+        """
+        The column's fingerprint
+        """
+        return self.entry.key
+
+    @property
+    def nbytes(self):
+        """
+        What the entry is charged in the cache
+        """
+        return self.entry.nbytes
+
+    def strings(self):
+        """
+        See CachedColumn.strings
+        """
+        return self.entry.strings(self.values)
+
+    def width(self, block_size=MEASURE_BLOCK_SIZE):
+        """
+        See CachedColumn.width
+        """
+        return self.entry.width(self.values, block_size)
+
+    def squished(self, ideal_length, ellipses, squish):
+        """
+        See CachedColumn.squished
+        """
+        return self.entry.squished(self.values, ideal_length, ellipses, squish)
+
+class FrameColumns:
+    """
+    The cached columns of one frame, each fingerprinted at most once
+    however often it is asked for. Made by ColumnCache.frame to last as
+    long as a single render
+    """
+
+    def __init__(self, cache, frame):
+        self._cache = cache
+        self._frame = frame
+        self._entries = {}
+
+    def frame(self, frame):
+        """
+        FrameColumns for frame, this one when it is the same frame
+        """
+        if frame is self._frame:
+            return self
+
+        return self._cache.frame(frame)
+
+    def __getitem__(self, name):
+        entry = self._entries.get(name)
+        if entry is None:
+            entry = self._cache.column(self._frame[name])
+            self._entries[name] = entry
+
+        return entry
+
+class ColumnCache:
+    """
+    Holds a CachedColumn per column fingerprint
+
+    The cache is bounded by max_bytes, evicting the least recently used
+    columns first. Each entry is charged the size of its cached arrays
+    plus entry_bytes, so that entries holding only a width are evicted
+    too. It can be shared by several renders, including ones on
+    different threads
+    """
+
+    entry_bytes = 1024
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def column(self, column):
+        """
+        The BoundColumn for a column of values, or a Series
+        """
+        key = fingerprint(column)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = CachedColumn(self, key)
+                entry.nbytes = self.entry_bytes
+                self._entries[key] = entry
+                self._size += entry.nbytes
+                self._evict()
+            else:
+                self._entries.move_to_end(key)
+
+        return BoundColumn(entry, column)
+
+    def frame(self, frame):
+        """
+        FrameColumns looking up the columns of frame
+        """
+        return FrameColumns(self, frame)
+
+    def _grew(self, entry, nbytes):
+        with self._lock:
+            entry.nbytes += nbytes
+            if self._entries.get(entry.key) is entry:
+                self._size += nbytes
+
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            _key, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        """
+        Total size charged for the cached columns
+        """
+        return self._size
+
+    def clear(self):
+        """
+        Drops every cached column
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
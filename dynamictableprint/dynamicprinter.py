@@ -2,11 +2,18 @@
 The wrapper module around tableprint
 """
 
+import io
 import os
+import sys
+import numpy as np
 import tableprint as tp
 
-from .utils import find_column_widths
+from .cache import fingerprint
+from .utils import (MEASURE_BLOCK_SIZE, find_column_widths, max_column_width,
+                    measured_cheaply, open_output)
 from .squisher import DataFrameSquisher, SquishCalculator
+from .planner import RenderPlanner
+from .table import as_table, select_rows
 
 class DynamicTablePrint:
     """
@@ -39,10 +46,14 @@ class DynamicTablePrint:
         return screen_width
 
     def __init__(self, data_frame, angel_column=None, squish_column=None,
-                 screen_width=None):
+                 screen_width=None, cache=None, sort_by=None, top_n=None,
+                 ascending=False, measure_all=False, budget=None,
+                 wrap=False, max_lines=None, persistent_cache=None):
         """
         data_frame is the Pandas DataFrame object, or an object which will
-        respond in the same manner
+        respond in the same manner (see the table module). Column dicts,
+        lists of dicts, NumPy structured arrays and pyarrow Tables are
+        adapted to that without needing pandas
 
         The angel_column is a string which matches a column name.
         This column will be the last column to be squished in a single
@@ -50,10 +61,43 @@ class DynamicTablePrint:
 
         This is in contrast to the squish column, which is the first
         on any chopping block
+
+        cache is an optional ColumnCache, shared between re-renders so
+        that unchanged columns are not stringified and squished again
+
+        sort_by orders the rows by a column (or list of columns), largest
+        first unless ascending. top_n keeps only that many rows, picked by
+        partial selection rather than a full sort, and only those rows are
+        squished and printed. Columns are measured over the printed rows,
+        or over every row if measure_all
+
+        budget is a time in seconds the render should aim to finish in,
+        see plan
+
+        With wrap, values too long for their column carry on over extra
+        lines instead of being cut short with ellipses, using at most
+        max_lines lines per row
+
+        persistent_cache is an optional PersistentCache, which keeps
+        measurements and layouts on disk between runs
         """
-        self.data_frame = data_frame.reset_index(drop=True)
+        self.sort_by = sort_by
+        self.top_n = top_n
+        self.ascending = ascending
+
+        data_frame = as_table(data_frame)
+        self.data_frame = self.select_rows(data_frame)
+        if hasattr(self.data_frame, 'reset_index'):
+            self.data_frame = self.data_frame.reset_index(drop=True)
+        self.measured_frame = data_frame if measure_all else self.data_frame
         self.squish_column = squish_column
         self.angel_column = angel_column
+        self.cache = cache
+        self.budget = budget
+        self.render_plan = None
+        self.wrap = wrap
+        self.max_lines = max_lines
+        self.persistent_cache = persistent_cache
 
         self.config = DefaultConfig()
 
@@ -62,27 +106,193 @@ class DynamicTablePrint:
         self.squish_calculator = SquishCalculator
         self.squisher = DataFrameSquisher
 
+    def select_rows(self, data_frame):
+        """
+        The rows of data_frame to print, according to sort_by and top_n
+        """
+        if not hasattr(data_frame, 'nlargest'):
+            return select_rows(data_frame, self.sort_by, self.top_n,
+                               self.ascending)
+
+        if self.sort_by is None:
+            if self.top_n is None:
+                return data_frame
+
+            return data_frame.head(self.top_n)
+
+        if self.top_n is None:
+            return data_frame.sort_values(
+                self.sort_by, ascending=self.ascending, kind='stable')
+
+        try:
+            if self.ascending:
+                return data_frame.nsmallest(self.top_n, self.sort_by)
+
+            return data_frame.nlargest(self.top_n, self.sort_by)
+        except TypeError:
+            # nlargest only selects on numeric columns
+            return data_frame.sort_values(
+                self.sort_by, ascending=self.ascending,
+                kind='stable').head(self.top_n)
+
+    def plan(self, budget=None):
+        """
+        Chooses, and returns, the RenderPlan for this table: exact or
+        sampled width measurement, serial or parallel squishing, and
+        the full table or only its first rows, so as to finish within
+        budget seconds (or the budget given on creation)
+
+        Without any budget the whole table is measured and printed
+        """
+        if budget is None:
+            budget = self.budget
+
+        self.render_plan = RenderPlanner(budget).plan(
+            self.data_frame, self.measured_frame)
+        return self.render_plan
+
+    def _plan(self):
+        if self.render_plan is None:
+            self.plan()
+
+        return self.render_plan
+
     def write_to_screen(self):
         """
         The key method to this class
         prints the data frame in a nice manner which scales to the terminal size
         available to the user.
         """
-        screen_width, widths, modified_data_frame = self.fit_screen()
+        self.write_to(sys.stdout)
+
+    def write_to(self, out):
+        """
+        Prints the data frame to out, anything with a write() and
+        flush() method
+        """
+        for chunk in self.render_chunks():
+            out.write(chunk)
 
-        tp.banner(
-            self.config.banner,
-            width=screen_width,
+        out.flush()
+
+    def render(self):
+        """
+        Returns everything write_to_screen would have printed, as one string
+        """
+        buffer = io.StringIO()
+        self.write_to(buffer)
+        return buffer.getvalue()
+
+    def render_chunks(self):
+        """
+        Yields the printed output in pieces: the banners and the header
+        first, then blocks of config.chunk_size rows, then the bottom rule
+        """
+        return self._render_grid(self.fit_screen())
+
+    def render_blocks(self):
+        """
+        The same pieces as render_chunks, but each block of rows is only
+        squished as it is rendered, so memory use does not grow with
+        the number of rows
+        """
+        desired_column_widths = self.fit_columns()
+        if desired_column_widths is None:
+            return self._render_grid(self.fit_screen())
+
+        squisher = self.squisher(desired_column_widths, self.data_frame,
+                                 wrap=self.wrap, max_lines=self.max_lines)
+        chunk_size = self.config.chunk_size
+        blocks = (squisher.squish_to_grid(start, start + chunk_size)
+                  for start in range(0, len(self.data_frame), chunk_size))
+
+        return self._render_chunks(
+            self._table_width(desired_column_widths),
+            tuple(desired_column_widths.values()),
+            squisher.squish_headers(),
+            blocks,
         )
 
+    def write_to_file(self, path_or_fileobj, compression='infer'):
+        """
+        Writes the table to a path or an open file object, rendering
+        it block by block, see render_blocks
+
+        compression is None, 'gzip', 'xz', or 'infer' to pick it from
+        a .gz or .xz suffix on the path
+        """
+        with open_output(path_or_fileobj, compression,
+                         self.config.encoding) as out:
+            for chunk in self.render_blocks():
+                out.write(chunk)
+
+    def _render_grid(self, fitted):
+        screen_width, widths, grid = fitted
+
         if self.data_frame.empty:
-            tp.banner(
-                self.config.empty_banner,
-                width=screen_width,
-            )
+            return self._render_chunks(screen_width, widths, None, ())
+
+        chunk_size = self.config.chunk_size
+        blocks = (grid.block(start, start + chunk_size)
+                  for start in range(0, len(grid), chunk_size))
+
+        return self._render_chunks(screen_width, widths, grid.headers, blocks,
+                                   len(self.data_frame) - grid.row_count)
+
+    def _render_chunks(self, screen_width, widths, headers, blocks,
+                       hidden_rows=0):
+        banner = self._banner(self.config.banner, screen_width)
+
+        if self.data_frame.empty:
+            yield banner + self._banner(self.config.empty_banner, screen_width)
             return
 
-        tp.dataframe(modified_data_frame, width=widths)
+        yield banner + tp.header(headers, width=widths) + '\n'
+
+        for block in blocks:
+            yield ''.join(tp.row(values, width=widths) + '\n'
+                          for values in block)
+
+        footer = ''
+        if hidden_rows:
+            footer = self._banner(
+                self.config.viewport_banner.format(hidden_rows), screen_width)
+
+        yield tp.bottom(len(widths), width=widths) + '\n' + footer
+
+    @staticmethod
+    def _banner(message, width):
+        """
+        The string tp.banner would have printed
+        """
+        return tp.header(
+            [message],
+            width=max(width, len(message)),
+            style='banner',
+        ) + '\n'
+
+    async def write_async(self, writer):
+        """
+        Writes the table to an asyncio.StreamWriter
+
+        Measuring, squishing and formatting each chunk run in the default
+        executor, so the event loop stays free between chunks, and
+        writer.drain() is awaited after every chunk for backpressure
+        """
+        # imported here since it is slow to import, and only needed here.
+        # get_event_loop gives the running loop, back to Python 3.6
+        import asyncio
+        loop = asyncio.get_event_loop()
+        fitted = await loop.run_in_executor(None, self.fit_screen)
+        chunks = self._render_grid(fitted)
+
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                break
+
+            writer.write(chunk.encode(self.config.encoding))
+            await writer.drain()
 
     @staticmethod
     def printable_screen_width(columns, screen_width):
@@ -111,23 +321,88 @@ class DynamicTablePrint:
         return int(table_width)
 
     @staticmethod
-    def _column_widths(dataframe):
-        columns = dataframe.columns.values.tolist()
-        column_widths = find_column_widths(dataframe, columns)
+    def _column_widths(dataframe, cache=None, block_size=MEASURE_BLOCK_SIZE):
+        columns = list(dataframe.columns)
+        column_widths = find_column_widths(dataframe, columns, cache,
+                                           block_size)
         return column_widths, columns
 
-    def fit_screen(self):
+    def fit_columns(self):
         """
-        We take the full length of the available screen
-        and force the widths to be less than or equal to this
+        Measures the columns and squishes their widths to fit the screen,
+        without touching the data itself. None for an empty data frame
+
+        With a persistent_cache, and exact measurement, both the
+        measurements and the resulting layout are looked up by the
+        fingerprints of the columns, so that columns slow to measure are
+        only measured the first time they are seen
         """
+        return self._fit_columns(self.cache)
+
+    def _fit_columns(self, cache):
         if self.data_frame.empty:
-            return (self.config.default_screen_width,
-                    self.config.default_screen_width - self.config.edge_width,
-                    self.data_frame)
+            return None
+
+        measured_frame = self._measured_sample()
+        block_size = self.config.chunk_size
+        store = self.persistent_cache
+        if store is None or self._plan().measure != 'exact':
+            column_widths, columns = self._column_widths(
+                measured_frame, cache, block_size)
+            return self._squish_widths(columns, column_widths)
+
+        columns = list(measured_frame.columns)
+        width_keys = [self._width_key(measured_frame, column, cache,
+                                     block_size) for column in columns]
+        layout_key = ('layout', columns, width_keys, self.screen_width,
+                      self.squish_column, self.angel_column)
+
+        layout = store.get(layout_key)
+        if layout is not None:
+            return dict(zip(columns, layout))
+
+        column_widths = {}
+        for column, width_key in zip(columns, width_keys):
+            if width_key[0] == 'measured':
+                width = width_key[1]
+            else:
+                width = store.get(width_key)
+                if width is None:
+                    width = self._data_width(measured_frame, column, cache,
+                                             block_size)
+                    store.put(width_key, width)
+
+            column_widths[column] = max(width, len(str(column)))
+
+        desired_column_widths = self._squish_widths(columns, column_widths)
+        store.put(layout_key, [int(desired_column_widths[column])
+                               for column in columns])
+        return desired_column_widths
 
-        column_widths, columns = self._column_widths(self.data_frame)
+    @staticmethod
+    def _width_key(frame, column, cache, block_size=MEASURE_BLOCK_SIZE):
+        """
+        What a column's width is stored under. Columns which are cheaper
+        to measure than to fingerprint are measured, and the key is their
+        width. Others are keyed by their fingerprint
+        """
+        if measured_cheaply(frame[column]):
+            return ('measured',
+                    int(max_column_width(frame[column], block_size)))
+
+        if cache is not None:
+            return ('width', cache.frame(frame)[column].key)
 
+        return ('width', fingerprint(frame[column]))
+
+    @staticmethod
+    def _data_width(frame, column, cache, block_size=MEASURE_BLOCK_SIZE):
+        if cache is not None:
+            return cache.frame(frame)[column].width(block_size)
+
+        return int(max_column_width(frame[column], block_size))
+
+    def _squish_widths(self, columns, column_widths):
         printable_screen_width = self.printable_screen_width(
             columns, self.screen_width)
 
@@ -137,19 +412,57 @@ class DynamicTablePrint:
             squish=self.squish_column,
             angel=self.angel_column,
         )
-        desired_column_widths = calculator.squish_columns()
+        return calculator.squish_columns()
+
+    def _measured_sample(self):
+        """
+        The rows the widths are measured over. When the plan samples, the
+        rows in view are always part of the sample so that they fit
+        """
+        plan = self._plan()
+        if plan.measure == 'exact':
+            return self.measured_frame
+
+        generator = np.random.default_rng(0)
+        rows = generator.choice(
+            len(self.measured_frame), plan.sample_size, replace=False)
+        if self.measured_frame is self.data_frame:
+            rows = np.union1d(rows, np.arange(plan.rows))
+
+        return self.measured_frame.take(np.sort(rows))
+
+    def fit_screen(self):
+        """
+        We take the full length of the available screen
+        and force the widths to be less than or equal to this
+        """
+        if self.data_frame.empty:
+            return (self.config.default_screen_width,
+                    self.config.default_screen_width - self.config.edge_width,
+                    self.data_frame)
+
+        # each column is fingerprinted once, for measuring and squishing
+        cache = self.cache
+        if cache is not None:
+            cache = cache.frame(self.data_frame)
+
+        desired_column_widths = self._fit_columns(cache)
 
         squisher = self.squisher(
             desired_column_widths,
-            self.data_frame)
+            self.data_frame,
+            cache=cache,
+            wrap=self.wrap,
+            max_lines=self.max_lines)
 
-        squisher.squish()
-        modified_data_frame = squisher.squished_dataframe
+        plan = self._plan()
+        grid = squisher.squish_to_grid(0, plan.rows, workers=plan.workers) \
+            if plan.viewport else squisher.squish_to_grid(workers=plan.workers)
 
         printing_widths = tuple(desired_column_widths.values())
         table_width = self._table_width(desired_column_widths)
 
-        return table_width, printing_widths, modified_data_frame
+        return table_width, printing_widths, grid
 
 class DefaultConfig:
     """
@@ -162,6 +475,9 @@ class DefaultConfig:
         "empty_banner",
         "default_screen_width",
         "edge_width",
+        "chunk_size",
+        "encoding",
+        "viewport_banner",
     ]
 
     def __init__(self):
@@ -175,3 +491,13 @@ class DefaultConfig:
 
         """ Width due to spaces on either side of the table"""
         self.edge_width = 2
+
+        """ Rows measured, and rendered per chunk when output is written
+        piecewise, at a time """
+        self.chunk_size = 1000
+
+        """ Encoding for output written as bytes """
+        self.encoding = 'utf-8'
+
+        """ Banner after a table cut short by its render plan """
+        self.viewport_banner = '... {} more rows'
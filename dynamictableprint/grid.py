@@ -0,0 +1,82 @@
+"""
+The compact representation of a squished table, which the renderer
+reads directly
+"""
+
+import numpy as np
+
+class SquishedGrid:
+    """
+    Holds the squished cells of a table
+
+    Rather than one Python str per cell, each column is a single NumPy
+    fixed-width unicode array whose width is the requested column width,
+    so memory scales with the number of characters printed
+
+    A column may also be anything which packs itself into such an array
+    when sliced, like the Arrow backend's ArrowColumn, so that it is only
+    packed a block at a time as it is rendered
+    """
+
+    # rows packed at a time when iterating over the grid
+    block_size = 1000
+
+    def __init__(self, headers, columns, row_count=None):
+        self.headers = list(headers)
+        self.columns = [column if hasattr(column, 'dtype') else np.asarray(column)
+                        for column in columns]
+        self._row_count = row_count
+
+    @staticmethod
+    def fixed_width(values, width):
+        """
+        Packs an iterable of strings into a fixed-width unicode array.
+        A width of zero is bumped to one since NumPy has no '<U0'
+        """
+        return np.asarray(values, dtype='<U%d' % max(int(width), 1))
+
+    def __len__(self):
+        if not self.columns:
+            return 0
+
+        return len(self.columns[0])
+
+    def __getitem__(self, index):
+        return tuple(column[index] for column in self.columns)
+
+    def __iter__(self):
+        for start in range(0, len(self), self.block_size):
+            yield from zip(*(column[start:start + self.block_size]
+                             for column in self.columns))
+
+    @property
+    def row_count(self):
+        """
+        The number of rows of data the grid holds. This is fewer than its
+        length when wrapped values take up several lines
+        """
+        if self._row_count is None:
+            return len(self)
+
+        return self._row_count
+
+    def block(self, start, stop):
+        """
+        The rows from start up to stop, as a grid sharing this one's buffers
+        """
+        return SquishedGrid(
+            self.headers, [column[start:stop] for column in self.columns])
+
+    @property
+    def widths(self):
+        """
+        The widths each column was packed to
+        """
+        return tuple(column.dtype.itemsize // 4 for column in self.columns)
+
+    @property
+    def nbytes(self):
+        """
+        Total size of the cell buffers
+        """
+        return sum(column.nbytes for column in self.columns)
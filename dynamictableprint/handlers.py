@@ -0,0 +1,180 @@
+"""
+logging handlers which print DataFrame payloads as dynamic tables
+"""
+
+import copy
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+
+from .dynamicprinter import DynamicTablePrint
+
+def table_payload(record):
+    """
+    The DataFrame carried by a record, either passed as the message itself
+    or through extra={'dataframe': ...}, else None
+    """
+    payload = getattr(record, 'dataframe', None)
+    if payload is None and hasattr(record.msg, 'columns'):
+        payload = record.msg
+
+    return payload
+
+class DynamicTableHandler(logging.Handler):
+    """
+    Renders DataFrame payloads as tables of a fixed screen_width, and
+    other records as formatted lines
+
+    emit only queues the record. A worker thread renders queued records
+    through the fit_screen pipeline and writes up to batch_size of them
+    to the stream in a single write
+
+    The worker never takes the handler's own lock, which logging holds
+    while it calls emit, flush and close, so that waiting on the queue
+    or on the worker cannot deadlock. Writes take a private lock instead
+    """
+
+    _stop = object()
+
+    def __init__(self, stream=None, screen_width=80, batch_size=64,
+                 max_queued=1024):
+        logging.Handler.__init__(self)
+        self.stream = stream if stream is not None else sys.stderr
+        self.screen_width = screen_width
+        self.batch_size = batch_size
+
+        self._queue = queue.Queue(max_queued)
+        self._stream_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+
+    def handle(self, record):
+        """
+        Filters the record and then emits it, without holding the handler
+        lock, since emit may wait for room in the queue
+        """
+        filtered = self.filter(record)
+        if isinstance(filtered, logging.LogRecord):
+            record = filtered
+        if filtered:
+            self.emit(record)
+
+        return filtered
+
+    def emit(self, record):
+        """
+        Queues the record for the worker thread, waiting while the queue
+        holds max_queued records
+        """
+        self._queue.put(record)
+
+    def render(self, record):
+        """
+        The text written to the stream for a record
+
+        A table's banner is just the record's message, or the logger's
+        name when the DataFrame is the message. Any traceback or stack
+        follows the table as plain lines
+        """
+        payload = table_payload(record)
+        if payload is None:
+            return self.format(record) + '\n'
+
+        table = DynamicTablePrint(payload, screen_width=self.screen_width)
+        table.config.banner = \
+            record.name if payload is record.msg else record.getMessage()
+        return table.render() + self.trailer(record)
+
+    def trailer(self, record):
+        """
+        The traceback and stack of a record, as formatted by the
+        handler's formatter
+        """
+        formatter = self.formatter or logging.Formatter()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = formatter.formatException(record.exc_info)
+
+        lines = []
+        if record.exc_text:
+            lines.append(record.exc_text)
+        if record.stack_info:
+            lines.append(formatter.formatStack(record.stack_info))
+
+        return ''.join(line + '\n' for line in lines)
+
+    def _work(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not self._stop:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if record is not self._stop]
+            self._write(records)
+
+            for _record in batch:
+                self._queue.task_done()
+
+            if batch[-1] is self._stop:
+                return
+
+    def _write(self, records):
+        texts = []
+        for record in records:
+            try:
+                texts.append(self.render(record))
+            except Exception: # pylint: disable=broad-except
+                self.handleError(record)
+
+        if not texts:
+            return
+
+        with self._stream_lock:
+            try:
+                self.stream.write(''.join(texts))
+                self.stream.flush()
+            except Exception: # pylint: disable=broad-except
+                self.handleError(records[-1])
+
+    def flush(self):
+        """
+        Waits until every queued record has been written
+        """
+        if self._worker.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """
+        Writes out what is queued, then stops the worker thread
+        """
+        if self._worker.is_alive():
+            self._queue.put(self._stop)
+            self._worker.join()
+
+        logging.Handler.close(self)
+
+class DynamicTableQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler which keeps DataFrame payloads intact
+
+    The stock QueueHandler formats each record into a string before
+    queueing it, which would print a DataFrame with str(). Records with a
+    DataFrame payload are queued as they are, for a QueueListener to hand
+    to a DynamicTableHandler
+    """
+
+    def prepare(self, record):
+        if table_payload(record) is None:
+            return logging.handlers.QueueHandler.prepare(self, record)
+
+        # the traceback is kept as text, since exc_info cannot be pickled
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            formatter = self.formatter or logging.Formatter()
+            record.exc_text = formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
@@ -0,0 +1,130 @@
+"""
+An on-disk cache of column measurements and layouts, so that a short
+lived process printing the same tables again can skip measuring them
+"""
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+class PersistentCache:
+    """
+    Stores small JSON values in a directory, one file per key
+
+    Files are written to a temporary name and then renamed into place,
+    so readers never see half an entry. Entries unused for max_age
+    seconds are dropped, then the least recently used ones until the
+    directory holds at most max_bytes
+
+    The directory is only scanned for eviction on the first put, and
+    again whenever the entries put since would take it over max_bytes
+    """
+
+    def __init__(self, directory, max_bytes=16 * 1024 * 1024,
+                 max_age=7 * 24 * 60 * 60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # bytes in the directory, as of the last scan plus entries put since
+        self._size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + '.json')
+
+    def get(self, key):
+        """
+        The value stored for key, or None
+        """
+        path = self._path(key)
+        try:
+            if self._expired(os.path.getmtime(path)):
+                os.remove(path)
+                return None
+
+            with open(path, encoding='utf-8') as entry_file:
+                entry = json.load(entry_file)
+
+            # marks the entry as recently used
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('key') != repr(key):
+            return None
+
+        return entry['value']
+
+    def put(self, key, value):
+        """
+        Stores value, which must be JSON serialisable, for key
+        """
+        entry = json.dumps({'key': repr(key), 'value': value}).encode('utf-8')
+
+        handle, temporary = tempfile.mkstemp(dir=self.directory,
+                                             suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as entry_file:
+                entry_file.write(entry)
+            os.replace(temporary, self._path(key))
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+        if self._size is None or (self.max_bytes is not None and
+                                  self._size + len(entry) > self.max_bytes):
+            self.evict()
+        else:
+            self._size += len(entry)
+
+    def _expired(self, mtime):
+        return self.max_age is not None and time.time() - mtime > self.max_age
+
+    def evict(self):
+        """
+        Drops expired entries, then the least recently used ones while
+        over max_bytes
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            if self._expired(stat.st_mtime):
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _mtime, size, _path in entries)
+        for _mtime, size, path in entries:
+            if self.max_bytes is None or total <= self.max_bytes:
+                break
+
+            self._remove(path)
+            total -= size
+
+        self._size = total
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        """
+        Drops every entry
+        """
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            self._remove(path)
+
+        self._size = 0
@@ -0,0 +1,161 @@
+"""
+Chooses how to render a table so that it finishes within a time budget
+"""
+
+import collections
+import os
+
+from . import arrow
+
+class RenderPlan(collections.namedtuple('RenderPlan', [
+        'measure',
+        'sample_size',
+        'workers',
+        'rows',
+        'total_rows',
+        'estimated_seconds',
+])):
+    """
+    The strategy chosen for a render
+
+    measure is 'exact' or 'sampled' (over sample_size rows), squishing is
+    parallel over workers threads when workers > 1, and only the first
+    rows of total_rows are rendered
+    """
+    __slots__ = ()
+
+    @property
+    def squish(self):
+        """
+        'serial' or 'parallel'
+        """
+        return 'parallel' if self.workers > 1 else 'serial'
+
+    @property
+    def viewport(self):
+        """
+        True when only some of the rows are rendered
+        """
+        return self.rows < self.total_rows
+
+    def describe(self):
+        """
+        A one line report of the plan
+        """
+        measure = self.measure
+        if measure == 'sampled':
+            measure = 'sampled ({} rows)'.format(self.sample_size)
+
+        render = 'viewport ({} of {} rows)'.format(self.rows, self.total_rows) \
+            if self.viewport else 'full ({} rows)'.format(self.total_rows)
+
+        return '{} measurement, {} squishing, {} render, ~{:.1f} ms'.format(
+            measure, self.squish, render, self.estimated_seconds * 1000)
+
+class RenderPlanner:
+    """
+    Picks a RenderPlan for a frame from its shape and dtypes
+
+    The costs are rough seconds per cell, and can be tuned per instance.
+    Only Arrow-backed string columns are squished on threads, since their
+    kernels release the GIL while str() and float formatting hold it.
+    Memory use is not looked at: the plan only bounds time
+    """
+
+    # measuring Arrow-backed strings, boolean and integer columns, and
+    # anything else
+    arrow_measure_cost = 2e-8
+    numeric_measure_cost = 1e-8
+    measure_cost = 1.5e-6
+
+    squish_cost = 1e-6
+    render_cost = 1e-5
+
+    # at most this share of the budget goes on measuring
+    measure_share = 0.25
+
+    # squishing takes at least this long before threads are worth it
+    parallel_threshold = 0.005
+
+    min_sample_size = 1000
+    min_rows = 10
+
+    def __init__(self, budget, workers=None):
+        self.budget = budget
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    def _column_measure_cost(self, dtype):
+        # checked in this order, so that pyarrow is not imported for
+        # tables which cannot hold Arrow data
+        if (getattr(dtype, 'storage', None) == 'pyarrow'
+                and arrow.load() is not None):
+            return self.arrow_measure_cost
+
+        if getattr(dtype, 'kind', None) in ('b', 'i', 'u'):
+            return self.numeric_measure_cost
+
+        return self.measure_cost
+
+    @staticmethod
+    def _squished_by_arrow(dtype):
+        return (getattr(dtype, 'storage', None) == 'pyarrow'
+                and arrow.load() is not None)
+
+    def plan(self, data_frame, measured_frame=None):
+        """
+        The RenderPlan for data_frame, measuring measured_frame
+        """
+        if measured_frame is None:
+            measured_frame = data_frame
+
+        total_rows = len(data_frame)
+        number_columns = max(len(data_frame.columns), 1)
+        arrow_columns = sum(map(self._squished_by_arrow, data_frame.dtypes))
+
+        # measuring
+        row_measure_cost = sum(self._column_measure_cost(dtype)
+                               for dtype in measured_frame.dtypes)
+
+        if self.budget is None:
+            _rows, row_cost = self._rows_within(0.0, total_rows,
+                                                number_columns, 0, 1)
+            return RenderPlan(
+                'exact', len(measured_frame), 1, total_rows, total_rows,
+                len(measured_frame) * row_measure_cost + total_rows * row_cost)
+        measure_budget = self.budget * self.measure_share
+        sample_size = len(measured_frame)
+        measure = 'exact'
+
+        if sample_size * row_measure_cost > measure_budget:
+            measure = 'sampled'
+            sample_size = max(self.min_sample_size,
+                              int(measure_budget / row_measure_cost))
+            sample_size = min(sample_size, len(measured_frame))
+
+        measure_seconds = sample_size * row_measure_cost
+
+        # squishing and rendering
+        remaining = max(self.budget - measure_seconds, 0.0)
+        workers = 1
+        rows, row_cost = self._rows_within(remaining, total_rows,
+                                           number_columns, 0, workers)
+
+        if (rows * arrow_columns * self.squish_cost > self.parallel_threshold
+                and arrow_columns > 1 and self.workers > 1):
+            workers = min(self.workers, arrow_columns)
+            rows, row_cost = self._rows_within(remaining, total_rows,
+                                               number_columns, arrow_columns,
+                                               workers)
+
+        return RenderPlan(measure, sample_size, workers, rows, total_rows,
+                          measure_seconds + rows * row_cost)
+
+    def _rows_within(self, seconds, total_rows, number_columns,
+                     arrow_columns, workers):
+        # only the Arrow-backed columns are squished in parallel
+        serial_columns = number_columns - arrow_columns
+        row_cost = (number_columns * self.render_cost
+                    + serial_columns * self.squish_cost
+                    + arrow_columns * self.squish_cost / workers)
+        rows = min(total_rows, max(self.min_rows, int(seconds / row_cost)))
+        return rows, row_cost
@@ -3,8 +3,16 @@ The worker module which calculates the columns widths
 and modifies the table accordingly
 """
 
+import concurrent.futures
 import copy
 
+import numpy as np
+
+from . import arrow
+from .cache import stringify, truncated
+from .grid import SquishedGrid
+from .table import column_rows
+
 class DataFrameSquisher:
     """
     Takes the column data, and squishes the columns based on that
@@ -12,13 +20,28 @@ class DataFrameSquisher:
 
     __ellipses = '...'
 
-    def __init__(self, requested_column_size, dataframe):
+    def __init__(self, requested_column_size, dataframe, cache=None,
+                 wrap=False, max_lines=None):
         self.requested_column_size = requested_column_size
         self.dataframe = dataframe
-        self.squished_dataframe = copy.deepcopy(dataframe)
+        self.cache = cache
+        self.wrap = wrap
+        self.max_lines = max_lines
+        self._squished_dataframe = None
 
-        # alias for internal use only
-        self._sdf = self.squished_dataframe
+    @property
+    def squished_dataframe(self):
+        """
+        A squished copy of the dataframe, only made when asked for
+        since squish_to_grid never needs it
+        """
+        if self._squished_dataframe is None:
+            self._squished_dataframe = copy.deepcopy(self.dataframe)
+
+        return self._squished_dataframe
+
+    # alias for internal use only
+    _sdf = squished_dataframe
 
     def squish(self):
         """
@@ -38,11 +61,8 @@ class DataFrameSquisher:
         """
         for column in self._sdf.columns:
             ideal_length = self.requested_column_size[column]
-
-            # unable to use apply with lambda since
-            # the context changes and self is uncallable
-            for index, value in enumerate(self._sdf[column].values):
-                self._sdf.loc[index, column] = self._squish_to(value, ideal_length)
+            squished = self.squish_values(self._sdf[column], ideal_length)
+            self._sdf[column] = squished.tolist()
 
     def modify_column_names(self):
         """
@@ -58,6 +78,191 @@ class DataFrameSquisher:
 
         self._sdf.rename(columns=columns, inplace=True)
 
+    def squish_to_grid(self, start=None, stop=None, workers=1):
+        """
+        Squishes straight from the original dataframe into a SquishedGrid,
+        one column at a time, without copying the dataframe
+
+        start and stop limit the grid to a block of rows, and with
+        workers > 1 the Arrow-backed columns are squished on a pool of
+        threads
+
+        In wrap mode, see wrap_to_grid
+        """
+        if self.wrap:
+            return self.wrap_to_grid(start, stop)
+
+        cached = None
+        if self.cache is not None and start is None and stop is None:
+            cached = self.cache.frame(self.dataframe)
+
+        def squish_column(column):
+            ideal_length = self.requested_column_size[column]
+
+            if cached is not None:
+                return cached[column].squished(
+                    ideal_length, self.__ellipses, self.squish_to_column)
+
+            return self.squish_to_column(
+                column_rows(self.dataframe, column, start, stop), ideal_length)
+
+        if workers > 1:
+            # only Arrow kernels release the GIL, so other columns are
+            # squished on this thread while the pool runs
+            names = list(self.dataframe.columns)
+            threaded = [arrow.string_array(self.dataframe[column]) is not None
+                        for column in names]
+            with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+                futures = [executor.submit(squish_column, column)
+                           if pooled else None
+                           for column, pooled in zip(names, threaded)]
+                columns = [squish_column(column) if future is None
+                           else future.result()
+                           for column, future in zip(names, futures)]
+        else:
+            columns = [squish_column(column) for column in self.dataframe.columns]
+
+        return SquishedGrid(self.squish_headers(), columns)
+
+    def wrap_to_grid(self, start=None, stop=None):
+        """
+        Like squish_to_grid, but long values flow onto extra lines of
+        their row instead of being truncated. A row is as many lines
+        as its longest value needs, up to max_lines, and a value cut
+        short by max_lines ends with the ellipses
+
+        The breaks are worked out a column at a time: the values are
+        packed into a unicode array and viewed as code points, so each
+        line of a column is one slice across all of its rows. With
+        max_lines, values are cut to max_lines of characters, plus one to
+        tell which need ellipses, before being packed
+        """
+        names = list(self.dataframe.columns)
+        widths = [max(self.requested_column_size[column], 1) for column in names]
+
+        if self.cache is not None and start is None and stop is None:
+            cached = self.cache.frame(self.dataframe)
+            columns = [cached[column].strings() for column in names]
+        else:
+            columns = [stringify(column_rows(self.dataframe, column, start, stop))
+                       for column in names]
+
+        columns = [self._pack_lines(lines, width)
+                   for lines, width in zip(columns, widths)]
+        heights = self.row_heights(columns, widths)
+        starts = np.cumsum(heights) - heights
+        total = int(heights.sum())
+
+        wrapped = [self._wrap_column(lines, width, heights, starts, total)
+                   for lines, width in zip(columns, widths)]
+
+        return SquishedGrid(self.squish_headers(), wrapped,
+                            row_count=len(heights))
+
+    def row_heights(self, columns, widths):
+        """
+        The lines each row takes: the most any of its values needs at
+        its column's width, capped at max_lines
+        """
+        rows = len(columns[0]) if columns else 0
+        heights = np.ones(rows, dtype=np.int64)
+
+        for lines, width in zip(columns, widths):
+            needed = -(-np.char.str_len(lines) // width)
+            heights = np.maximum(heights, needed)
+
+        if self.max_lines is not None:
+            heights = np.minimum(heights, max(self.max_lines, 1))
+
+        return heights
+
+    def _pack_lines(self, lines, width):
+        if self.max_lines is None:
+            return lines.astype(str)
+
+        return lines.astype('<U%d' % (max(self.max_lines, 1) * width + 1))
+
+    def _wrap_column(self, lines, width, heights, starts, total):
+        wrapped = np.zeros(total, dtype='<U%d' % width)
+        if len(lines) == 0:
+            return wrapped
+
+        # each value as a row of code points, padded to whole lines
+        length = lines.dtype.itemsize // 4
+        codes = np.ascontiguousarray(lines).view(np.uint32)
+        codes = codes.reshape(len(lines), length)
+        padded = -(-length // width) * width
+        codes = np.pad(codes, ((0, 0), (0, padded - length)))
+
+        for line in range(min(int(heights.max()), padded // width)):
+            rows = heights > line
+            piece = codes[rows, line * width:(line + 1) * width]
+            wrapped[starts[rows] + line] = \
+                np.ascontiguousarray(piece).view('<U%d' % width).reshape(-1)
+
+        if self.max_lines is not None:
+            last = max(self.max_lines, 1) - 1
+            cut = np.char.str_len(lines) > (last + 1) * width
+            if cut.any():
+                rest = np.ascontiguousarray(codes[cut, last * width:])
+                rest = rest.view('<U%d' % rest.shape[1]).reshape(-1)
+                wrapped[starts[cut] + last] = self.squish_strings(rest, width)
+
+        return wrapped
+
+    def squish_headers(self):
+        """
+        The column names squished to the requested_column_size
+        """
+        return [self._squish_to(column, self.requested_column_size[column])
+                for column in self.dataframe.columns]
+
+    def squish_values(self, values, ideal_length):
+        """
+        The column-wise equivalent of _squish_to, returning a
+        fixed-width unicode array of at most ideal_length characters
+        """
+        return self.squish_to_column(values, ideal_length)[:]
+
+    def squish_to_column(self, values, ideal_length):
+        """
+        squish_values, but Arrow-backed string values are squished by the
+        Arrow backend into an ArrowColumn, which stays in Arrow until its
+        rows are rendered
+
+        Other values are cut to one character past ideal_length before
+        being packed, which is enough to tell which need ellipses
+        """
+        squished = arrow.squish(
+            values, ideal_length, self._ellipses_for(ideal_length))
+        if squished is not None:
+            return squished
+
+        return self.squish_strings(
+            truncated(values, ideal_length + 1), ideal_length)
+
+    def squish_strings(self, lines, ideal_length):
+        """
+        squish_values for values that are already a unicode array
+        """
+        if lines.size == 0:
+            return SquishedGrid.fixed_width(lines, ideal_length)
+
+        too_long = np.char.str_len(lines) > ideal_length
+        squished = SquishedGrid.fixed_width(lines, ideal_length)
+        if not too_long.any():
+            return squished
+
+        ellipses = self._ellipses_for(ideal_length)
+        keep = ideal_length - len(ellipses)
+        if keep > 0:
+            prefixes = SquishedGrid.fixed_width(squished[too_long], keep)
+            squished[too_long] = np.char.add(prefixes, ellipses)
+        else:
+            squished[too_long] = ellipses
+
+        return squished
+
     def set_ellipses(self, new_ellipses):
         """
         The only responsible way to set ellipses
@@ -71,17 +276,14 @@ class DataFrameSquisher:
         if len(line) <= ideal_length:
             return line
 
-        if self.__ideal(line, ideal_length):
-            return self._squish_line(line, ideal_length, self.__ellipses)
+        return self._squish_line(
+            line, ideal_length, self._ellipses_for(ideal_length))
 
-        ellipses = "." * (ideal_length - 1)
-        return self._squish_line(line, ideal_length, ellipses)
+    def _ellipses_for(self, ideal_length):
+        if ideal_length > len(self.__ellipses):
+            return self.__ellipses
 
-    def __ideal(self, line, ideal_length):
-        return(
-            (len(line) > ideal_length)
-            and (ideal_length > len(self.__ellipses))
-        )
+        return "." * (ideal_length - 1)
 
     @staticmethod
     def _squish_line(line, ideal_length, ellipses):
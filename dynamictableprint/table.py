@@ -0,0 +1,286 @@
+"""
+The table protocol the printer works with, and adapters onto it
+
+A table is anything with
+- columns, the column names in order
+- table[name], that column as a one dimensional array
+- len(table), the number of rows
+- empty, True when there are no rows or no columns
+- take(rows), a table of just those row positions
+- head(n), a table of the first n rows
+
+pandas DataFrames already are one. ColumnTable is a table without pandas,
+and as_table adapts column dicts, lists of records, NumPy structured arrays
+and pyarrow Tables to it
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+from . import arrow
+
+def column_values(table, name):
+    """
+    The values of a column, unwrapping a pandas Series to its array
+    """
+    column = table[name]
+    return getattr(column, 'values', column)
+
+def column_rows(table, name, start=None, stop=None):
+    """
+    A column cut to the rows from start up to stop. A pandas Series stays
+    a Series, so that its values print the way they do in pandas
+    """
+    column = table[name]
+    if hasattr(column, 'iloc'):
+        return column.iloc[start:stop]
+
+    return column[start:stop]
+
+def _as_column(values):
+    """
+    NumPy and Arrow arrays are kept as they are. Anything else becomes an
+    object array, so each value still prints as its own str()
+    """
+    if isinstance(values, np.ndarray) and values.ndim == 1:
+        return values
+
+    pyarrow = arrow.load()
+    if pyarrow is not None and isinstance(
+            values, (pyarrow.Array, pyarrow.ChunkedArray)):
+        return values
+
+    values = list(values)
+    return np.fromiter(values, dtype=object, count=len(values))
+
+def _record_column(values):
+    """
+    A column of record values. Columns of only booleans, only integers
+    or only floats become NumPy arrays of that type, so they print the
+    same and can be selected on as numbers. Anything else, including
+    numbers with missing values, stays an object array
+    """
+    for kind, dtype in ((bool, np.bool_), (int, np.int64), (float, np.float64)):
+        if values and all(type(value) is kind for value in values):
+            try:
+                return np.array(values, dtype=dtype)
+            except OverflowError:
+                break
+
+    return values
+
+def _take(column, rows):
+    if isinstance(column, np.ndarray):
+        return column[rows]
+
+    return column.take(rows)
+
+class ColumnTable:
+    """
+    A table held as named columns of equal length
+    """
+
+    def __init__(self, columns):
+        self._columns = {name: _as_column(values)
+                         for name, values in columns.items()}
+
+        if len({len(column) for column in self._columns.values()}) > 1:
+            raise ValueError('Columns must all be the same length')
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        A table from a sequence of dicts, one per row. Columns appear in
+        the order their names are first seen, and rows missing a column
+        hold None
+
+        Columns holding only booleans, integers or floats are given
+        that dtype
+        """
+        records = list(records)
+        names = {}
+        for record in records:
+            for name in record:
+                names.setdefault(name, None)
+
+        return cls({name: _record_column([record.get(name) for record in records])
+                    for name in names})
+
+    @classmethod
+    def from_structured(cls, array):
+        """
+        A table viewing the fields of a NumPy structured array
+        """
+        return cls({name: array[name] for name in array.dtype.names})
+
+    @classmethod
+    def from_arrow(cls, table):
+        """
+        A table from a pyarrow Table. String columns stay in Arrow for
+        the Arrow backend, others are converted to NumPy
+        """
+        columns = {}
+        for name, column in zip(table.column_names, table.columns):
+            if arrow.arrow_strings(column) is not None:
+                columns[name] = column
+            elif column.null_count:
+                columns[name] = column.to_pylist()
+            else:
+                columns[name] = column.to_numpy()
+
+        return cls(columns)
+
+    @property
+    def columns(self):
+        """
+        The column names, in order
+        """
+        return list(self._columns)
+
+    @property
+    def dtypes(self):
+        """
+        The dtype of each column, None for Arrow columns
+        """
+        return [getattr(column, 'dtype', None)
+                for column in self._columns.values()]
+
+    @property
+    def empty(self):
+        """
+        True when the table has no rows or no columns
+        """
+        return not self._columns or len(self) == 0
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def __len__(self):
+        for column in self._columns.values():
+            return len(column)
+
+        return 0
+
+    def take(self, rows):
+        """
+        A table of the rows at the given positions
+        """
+        return ColumnTable({name: _take(column, rows)
+                            for name, column in self._columns.items()})
+
+    def head(self, number):
+        """
+        A table of the first number rows
+        """
+        return ColumnTable({name: column[:number]
+                            for name, column in self._columns.items()})
+
+def as_table(data):
+    """
+    data as something which follows the table protocol
+    """
+    pyarrow = arrow.load()
+    if pyarrow is not None and isinstance(data, pyarrow.Table):
+        return ColumnTable.from_arrow(data)
+
+    if isinstance(data, np.ndarray) and data.dtype.names is not None:
+        return ColumnTable.from_structured(data)
+
+    if isinstance(data, Mapping):
+        return ColumnTable(data)
+
+    if hasattr(data, 'columns') and hasattr(data, 'take'):
+        return data
+
+    if isinstance(data, (list, tuple)) and all(
+            isinstance(record, Mapping) for record in data):
+        return ColumnTable.from_records(data)
+
+    raise TypeError('Cannot print a table from {}'.format(type(data).__name__))
+
+def select_rows(table, sort_by=None, top_n=None, ascending=False):
+    """
+    The rows of a table sorted by the sort_by column (or columns), largest
+    first unless ascending, and cut to the top_n rows
+
+    With a single numeric sort_by column, the top_n rows are picked by
+    partitioning and only those are sorted
+    """
+    if sort_by is None:
+        return table if top_n is None else table.head(top_n)
+
+    names = [sort_by] if not isinstance(sort_by, (list, tuple)) else sort_by
+    keys = [np.asarray(column_values(table, name)) for name in names]
+
+    if (top_n is not None and len(keys) == 1 and 0 < top_n < len(table)
+            and keys[0].dtype.kind in 'biuf'):
+        return table.take(_top_rows(keys[0], top_n, ascending))
+
+    order = _stable_order(keys, np.arange(len(table)), ascending)
+    if top_n is not None:
+        order = order[:top_n]
+
+    return table.take(order)
+
+def _top_rows(key, top_n, ascending):
+    """
+    The positions of the top_n smallest or largest keys, in order, ties
+    going to the earlier row. NaNs come last
+    """
+    missing = np.isnan(key) if key.dtype.kind == 'f' else None
+    if missing is not None and missing.any():
+        candidates = np.flatnonzero(~missing)
+        rows = candidates[_top_rows(
+            key[candidates], min(top_n, len(candidates)), ascending)]
+        return np.concatenate(
+            (rows, np.flatnonzero(missing)[:top_n - len(rows)]))
+
+    if top_n == 0:
+        return np.arange(0)
+
+    if ascending:
+        bound = np.partition(key, top_n - 1)[top_n - 1]
+        rows = np.flatnonzero(key < bound)
+    else:
+        bound = np.partition(key, len(key) - top_n)[len(key) - top_n]
+        rows = np.flatnonzero(key > bound)
+
+    ties = np.flatnonzero(key == bound)[:top_n - len(rows)]
+    rows = np.concatenate((rows, ties))
+
+    return rows[_stable_order([key[rows]], rows, ascending)]
+
+def _missing(key):
+    """
+    Which keys are missing: None, NaN or NaT
+    """
+    if key.dtype.kind == 'f':
+        return np.isnan(key)
+
+    if key.dtype.kind in 'mM':
+        return np.isnat(key)
+
+    if key.dtype.kind == 'O':
+        return np.fromiter(
+            (value is None or (isinstance(value, float) and value != value)
+             for value in key), dtype=bool, count=len(key))
+
+    return np.zeros(len(key), dtype=bool)
+
+def _stable_order(keys, positions, ascending):
+    """
+    Sorts by keys, the first the most significant, keeping ties in
+    their original order either way. Missing keys come last either way
+    """
+    columns = [positions]
+    for key in reversed(keys):
+        missing = _missing(key)
+        ranks = np.zeros(len(key), dtype=np.int64)
+        if not missing.all():
+            ranks[~missing] = np.unique(
+                key[~missing], return_inverse=True)[1].ravel()
+
+        columns += [ranks if ascending else -ranks, missing]
+
+    return np.lexsort(columns)
@@ -2,30 +2,212 @@
 Utilities
 """
 
-def max_column_width(column):
+import contextlib
+import gzip
+import io
+import lzma
+import os
+
+import numpy as np
+
+from . import arrow
+
+COMPRESSORS = {
+    'gzip': gzip.open,
+    'xz': lzma.open,
+}
+
+COMPRESSION_SUFFIXES = {
+    '.gz': 'gzip',
+    '.xz': 'xz',
+}
+
+BUFFER_SIZE = 1024 * 1024
+
+# rows stringified at a time when measuring, unless told otherwise
+MEASURE_BLOCK_SIZE = 1000
+
+def printed_values(values):
     """
-    Max width of a column, looping over all column elements
+    The values as the scalars printed in their cells. A pandas Series
+    gives its own scalars, e.g. Timestamps keeping their time zone, and
+    NumPy datetimes stay NumPy scalars rather than becoming integers
     """
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'mM':
+        return list(values)
 
-    return column \
-            .apply(lambda x: len(str(x))) \
-            .max()
+    if hasattr(values, 'tolist'):
+        return values.tolist()
 
-def max_width_for(frame, item):
+    if hasattr(values, 'to_pylist'):
+        return values.to_pylist()
+
+    return list(values)
+
+def blocks(column, block_size):
+    """
+    The column in consecutive pieces of at most block_size rows
+    """
+    rows = getattr(column, 'iloc', column)
+    for start in range(0, len(column), block_size):
+        yield rows[start:start + block_size]
+
+def numeric_column_width(column, block_size=MEASURE_BLOCK_SIZE):
+    """
+    Max width of the str() of a boolean, integer or float column, without
+    stringifying every element. Returns None for any other column
+
+    Integer widths come from the digits of the min and max, and booleans
+    from whether any are False. Float columns holding whole numbers are
+    worked out the same way, other floats fall back to str(). Missing
+    values in nullable columns count as the width of their str(), e.g. '<NA>'
+
+    Floats are looked at block_size at a time
+    """
+    dtype = getattr(column, 'dtype', None)
+    kind = getattr(dtype, 'kind', None)
+    if kind is None or kind not in 'biuf' or len(column) == 0:
+        return None
+
+    missing_width = 0
+    if isinstance(dtype, np.dtype):
+        values = np.asarray(column)
+    else:
+        # nullable pandas dtypes
+        missing = np.asarray(column.isna())
+        if missing.any():
+            missing_width = len(str(dtype.na_value))
+            if missing.all():
+                return missing_width
+
+        values = column[~missing].to_numpy(dtype=dtype.numpy_dtype)
+
+    if kind == 'b':
+        width = len(str(False)) if not values.all() else len(str(True))
+    elif kind in 'iu':
+        width = _extremes_width(values)
+    else:
+        width = _float_width(values, block_size)
+
+    return max(width, missing_width)
+
+def _extremes_width(values):
+    return max(len(str(values.min().item())), len(str(values.max().item())))
+
+def _float_width(values, block_size):
+    return max(_float_block_width(block)
+               for block in blocks(values, block_size))
+
+def _float_block_width(values):
+    finite = np.isfinite(values)
+
+    width = 0
+    if not finite.all():
+        width = max(len(str(value))
+                    for value in np.unique(values[~finite]).tolist())
+        values = values[finite]
+        if values.size == 0:
+            return width
+
+    # whole numbers below 1e16 print as their digits and '.0', so the
+    # widest is the min or the max, or '-0.0'. 1e16 is compared in
+    # float64, as it overflows narrower floats
+    magnitude = np.abs(values.astype(np.float64, copy=False)).max()
+    if magnitude < 1e16 and (values == np.trunc(values)).all():
+        width = max(width, _extremes_width(values))
+        if np.signbit(values).any():
+            width = max(width, len(str(-0.0)))
+
+        return width
+
+    return max(width, max(map(len, map(str, values.tolist()))))
+
+def max_column_width(column, block_size=MEASURE_BLOCK_SIZE):
+    """
+    Max width of a column, looping over all column elements block_size
+    at a time, so that only one block is ever held as Python objects
+
+    Numeric columns are measured by numeric_column_width, and Arrow-backed
+    string columns by the Arrow backend instead
+    """
+    width = numeric_column_width(column, block_size)
+    if width is not None:
+        return width
+
+    width = arrow.max_width(column)
+    if width is not None:
+        return width
+
+    return max((max(map(len, map(str, printed_values(block))))
+                for block in blocks(column, block_size)), default=0)
+
+def measured_cheaply(column):
+    """
+    True when max_column_width measures the column without a str() per
+    value: boolean and integer columns, and Arrow-backed strings
+    """
+    kind = getattr(getattr(column, 'dtype', None), 'kind', None)
+    return kind in ('b', 'i', 'u') or arrow.string_array(column) is not None
+
+def max_width_for(frame, item, cache=None, block_size=MEASURE_BLOCK_SIZE):
     """
     The maximum width of a column is either the maximum size of the strings
     within that column, OR it is the name of the column itself.
+
+    With a ColumnCache, unchanged columns are not measured again. Columns
+    which are cheaper to measure than to fingerprint are always measured
     """
 
     name_width = len(str(item))
-    return max(max_column_width(frame[item]), name_width)
+    if cache is not None and not measured_cheaply(frame[item]):
+        return max(cache.frame(frame)[item].width(block_size), name_width)
+
+    return max(max_column_width(frame[item], block_size), name_width)
 
-def find_column_widths(data_frame, fixed_columns=None):
+def find_column_widths(data_frame, fixed_columns=None, cache=None,
+                       block_size=MEASURE_BLOCK_SIZE):
     """
     Convenience method to loop over all columns
     """
     if fixed_columns is None:
-        fixed_columns = data_frame.columns.tolist()
+        fixed_columns = list(data_frame.columns)
+
+    return {column:max_width_for(data_frame, column, cache, block_size)
+            for column in fixed_columns}
+
+@contextlib.contextmanager
+def open_output(path_or_fileobj, compression='infer', encoding='utf-8'):
+    """
+    Opens a path, or wraps an open file object, for writing text
+
+    compression is None, 'gzip', 'xz', or 'infer' to pick it from the
+    path's suffix. File objects passed in are left open
+    """
+    is_path = isinstance(path_or_fileobj, (str, os.PathLike))
+
+    if compression == 'infer':
+        suffix = os.path.splitext(path_or_fileobj)[1] if is_path else None
+        compression = COMPRESSION_SUFFIXES.get(suffix)
+
+    if compression is not None:
+        if compression not in COMPRESSORS:
+            raise ValueError('Unknown compression: {}'.format(compression))
+
+        with COMPRESSORS[compression](path_or_fileobj, 'wt',
+                                      encoding=encoding) as out:
+            yield out
+
+    elif is_path:
+        with open(path_or_fileobj, 'w', encoding=encoding,
+                  buffering=BUFFER_SIZE) as out:
+            yield out
+
+    elif isinstance(path_or_fileobj, io.TextIOBase):
+        yield path_or_fileobj
+        path_or_fileobj.flush()
 
-    return {column:max_width_for(data_frame, column) for column in
-            fixed_columns}
+    else:
+        out = io.TextIOWrapper(path_or_fileobj, encoding=encoding)
+        yield out
+        out.flush()
+        out.detach()
@@ -0,0 +1,31 @@
+"""
+Thread-safe output of tables to a shared stream
+"""
+
+import sys
+import threading
+
+class SharedStreamWriter:
+    """
+    Lets many threads print tables to the same stream without
+    their rows interleaving
+
+    Each table is rendered into a private buffer without holding the lock,
+    so the formatting work happens concurrently. Only the single write of
+    the finished table to the stream is serialised
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+        self._lock = threading.Lock()
+
+    def write(self, table):
+        """
+        Renders a DynamicTablePrint (or takes an already rendered string)
+        and appends it to the stream in one piece
+        """
+        text = table if isinstance(table, str) else table.render()
+
+        with self._lock:
+            self.stream.write(text)
+            self.stream.flush()
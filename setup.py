@@ -141,6 +141,7 @@ setup(
     # For an analysis of "install_requires" vs pip's requirements files see:
     # https://packaging.python.org/en/latest/requirements.html
     install_requires=[
+        'numpy',
         'tableprint'
     ],  # Optional
 
@@ -154,6 +155,7 @@ setup(
     # projects.
     extras_require={ # Optional
         'dev': ['pandas'],
+        'arrow': ['pyarrow'],
         'test': ['unittest', 'pytest'],
     },
 
@@ -0,0 +1,97 @@
+"""
+Tests the optional Arrow backend
+"""
+
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+
+from dynamictableprint import arrow
+from dynamictableprint.cache import fingerprint
+from dynamictableprint.squisher import DataFrameSquisher
+from dynamictableprint.utils import max_column_width
+
+@unittest.skipUnless(arrow.available(), 'pyarrow is not installed')
+class TestArrowBackend(unittest.TestCase):
+    """
+    Tests that the Arrow kernels agree with the pure Python path
+    """
+    def setUp(self):
+        self.values = ['short', None, 'a much longer value', 'ünïcödé text']
+        self.series = pd.Series(self.values, dtype='string[pyarrow]')
+        self.squisher = DataFrameSquisher({}, pd.DataFrame())
+
+    def expected(self, values, ideal_length):
+        return [self.squisher._squish_to(value, ideal_length)
+                for value in values]
+
+    def test_max_width(self):
+        """
+        Nulls are measured as the text they print as
+        """
+        self.assertEqual(max_column_width(self.series), 19)
+        self.assertEqual(arrow.max_width(pd.Series(['<NA>'] * 2)), 4)
+        self.assertIsNone(arrow.max_width(pd.Series([1, 2])))
+
+    def test_squish_matches_python(self):
+        """
+        Truncation gives the same text as DataFrameSquisher._squish_to
+        """
+        for ideal_length in range(0, 21):
+            squished = self.squisher.squish_values(self.series, ideal_length)
+            self.assertEqual(squished.tolist(),
+                             self.expected(self.series, ideal_length))
+
+    def test_pyarrow_arrays(self):
+        """
+        pyarrow arrays are accepted directly
+        """
+        import pyarrow # pylint: disable=import-outside-toplevel
+        array = pyarrow.chunked_array([self.values[:2], self.values[2:]])
+        squished = self.squisher.squish_values(array, 8)
+        self.assertEqual(squished.tolist(), self.expected(
+            [str(value) for value in self.values], 8))
+
+    def test_grid_packs_rendered_blocks(self):
+        """
+        Squished Arrow columns stay in Arrow in the grid, and only the
+        rows of a block are packed when it is rendered
+        """
+        squisher = DataFrameSquisher({'text': 8},
+                                     pd.DataFrame({'text': self.series}))
+        grid = squisher.squish_to_grid()
+        self.assertIsInstance(grid.columns[0], arrow.ArrowColumn)
+        self.assertEqual(grid.widths, (8,))
+
+        block = grid.block(1, 3)
+        self.assertEqual(block.columns[0].dtype.str, '<U8')
+        self.assertEqual(block.columns[0].tolist(),
+                         self.expected(self.series[1:3], 8))
+        self.assertEqual([row[0] for row in grid],
+                         self.expected(self.series, 8))
+
+    def test_fingerprint_from_buffers(self):
+        """
+        Arrow-backed columns are fingerprinted from their buffers, without
+        converting them to NumPy
+        """
+        changed = self.series.copy()
+        changed[0] = 'other'
+        with mock.patch.object(np, 'asarray') as asarray:
+            self.assertEqual(fingerprint(self.series),
+                             fingerprint(self.series.copy()))
+            self.assertNotEqual(fingerprint(self.series), fingerprint(changed))
+            asarray.assert_not_called()
+
+    def test_fallback_without_pyarrow(self):
+        """
+        Without pyarrow, the pure Python path is used
+        """
+        with mock.patch.object(arrow, 'load', return_value=None):
+            self.assertIsNone(arrow.max_width(self.series))
+            squished = self.squisher.squish_values(self.series, 8)
+        self.assertEqual(squished.tolist(), self.expected(self.series, 8))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Tests the column cache
+"""
+
+import unittest
+import weakref
+from unittest import mock
+import pandas as pd
+
+from dynamictableprint import cache as column_cache
+from dynamictableprint.cache import ColumnCache, fingerprint
+from dynamictableprint.dynamicprinter import DynamicTablePrint
+from dynamictableprint.squisher import DataFrameSquisher
+from dynamictableprint.utils import find_column_widths
+
+class TestColumnCache(unittest.TestCase):
+    """
+    Tests the ColumnCache
+    """
+    def setUp(self):
+        length = 30
+        raw_data = {
+            'names': ["NAME"*3 for i in range(length)],
+            'numbers': [i * 1.5 for i in range(length)],
+            'mixed': [i if i % 2 else None for i in range(length)],
+        }
+        self.dataframe = pd.DataFrame(raw_data, columns=[*raw_data])
+
+    def test_fingerprint_follows_contents(self):
+        """
+        Equal columns share a fingerprint, a changed column does not
+        """
+        copied = self.dataframe.copy()
+        for column in self.dataframe.columns:
+            self.assertEqual(fingerprint(self.dataframe[column]),
+                             fingerprint(copied[column]))
+
+        copied.loc[3, 'names'] = 'changed'
+        copied.loc[3, 'numbers'] = -1.0
+        self.assertNotEqual(fingerprint(self.dataframe['names']),
+                            fingerprint(copied['names']))
+        self.assertNotEqual(fingerprint(self.dataframe['numbers']),
+                            fingerprint(copied['numbers']))
+
+    def test_rerender_reuses_columns(self):
+        """
+        Re-rendering an unchanged frame does no string work, and
+        gives the same output
+        """
+        cache = ColumnCache()
+        first = DynamicTablePrint(self.dataframe, screen_width=30, cache=cache)
+        expected = first.render()
+        self.assertEqual(len(cache), 3)
+
+        with mock.patch.object(column_cache, 'max_column_width') as measure, \
+                mock.patch.object(DataFrameSquisher, 'squish_values') as squish:
+            second = DynamicTablePrint(
+                self.dataframe.copy(), screen_width=30, cache=cache)
+            self.assertEqual(second.render(), expected)
+            measure.assert_not_called()
+            squish.assert_not_called()
+
+        uncached = DynamicTablePrint(self.dataframe, screen_width=30)
+        self.assertEqual(uncached.render(), expected)
+
+    def test_fingerprint_keeps_time_zones(self):
+        """
+        The same instants in different time zones print differently, so
+        they do not share a fingerprint
+        """
+        instants = pd.Series(pd.date_range('2020-01-01', periods=3, tz='UTC'))
+        self.assertNotEqual(
+            fingerprint(instants),
+            fingerprint(instants.dt.tz_convert('US/Eastern')))
+
+    def test_fingerprint_separates_values(self):
+        """
+        Values are hashed one by one, so moving text between them
+        changes the fingerprint
+        """
+        self.assertNotEqual(
+            fingerprint(pd.Series(['a\x00', 'b'], dtype=object)),
+            fingerprint(pd.Series(['a', '\x00b'], dtype=object)))
+
+    def test_warm_rerender_fingerprints_once(self):
+        """
+        A warm re-render fingerprints each column once, and neither
+        measures nor squishes it again
+        """
+        cache = ColumnCache()
+        DynamicTablePrint(self.dataframe, screen_width=30, cache=cache).fit_screen()
+
+        with mock.patch.object(column_cache, 'fingerprint',
+                               wraps=fingerprint) as hashed, \
+                mock.patch.object(column_cache, 'max_column_width') as measure, \
+                mock.patch.object(DataFrameSquisher, 'squish_to_column') as squish:
+            DynamicTablePrint(self.dataframe, screen_width=30,
+                              cache=cache).fit_screen()
+
+        self.assertEqual(hashed.call_count, len(self.dataframe.columns))
+        measure.assert_not_called()
+        squish.assert_not_called()
+
+    def test_measured_columns_are_bounded(self):
+        """
+        Entries which only hold a width are still charged, and so evicted,
+        and the cache does not keep their columns alive
+        """
+        cache = ColumnCache(max_bytes=4 * ColumnCache.entry_bytes)
+        for offset in range(50):
+            dataframe = pd.DataFrame({'mixed': [offset, None] * 100})
+            find_column_widths(dataframe, cache=cache)
+
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(cache.nbytes, 4 * ColumnCache.entry_bytes)
+
+        series = pd.Series([object()] * 3)
+        reference = weakref.ref(series)
+        cache.column(series).width()
+        del series
+        self.assertIsNone(reference())
+
+    def test_lru_eviction(self):
+        """
+        The least recently used column goes first once over max_bytes
+        """
+        names = ColumnCache().column(self.dataframe['names'])
+        names.strings()
+
+        cache = ColumnCache(max_bytes=names.nbytes + 1)
+        cache.column(self.dataframe['numbers']).strings()
+        cache.column(self.dataframe['names']).strings()
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.nbytes, names.nbytes)
+
+        key = fingerprint(self.dataframe['names'])
+        self.assertEqual(cache.column(self.dataframe['names']).key, key)
+
+if __name__ == '__main__':
+    unittest.main()
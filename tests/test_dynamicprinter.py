@@ -2,9 +2,17 @@
 Tests the table print extra module
 """
 
+import asyncio
+import gzip
+import io
+import lzma
+import os
+import tempfile
+import tracemalloc
 import unittest
 from unittest import mock
 import pandas as pd
+import tableprint as tp
 
 from dynamictableprint.dynamicprinter import DynamicTablePrint
 
@@ -88,6 +96,149 @@ class TestDynamicTablePrint(unittest.TestCase):
         dtp.write_to_screen()
         dtp.squish_calculator.assert_not_called()
 
+    def test_render(self):
+        """
+        render returns the banner and the table as a single string
+        """
+        dtp = DynamicTablePrint(self.dataframe, screen_width=60)
+        dtp.config.banner = 'Rendered'
+        lines = dtp.render().splitlines()
+        self.assertIn('Rendered', lines[1])
+        self.assertEqual(len(lines), 3 + 3 + 30 + 1)
+        self.assertEqual(len({len(line) for line in lines[3:]}), 1)
+
+    def test_render_matches_tableprint(self):
+        """
+        Rendering in chunks gives the same table tableprint would print
+        """
+        dtp = DynamicTablePrint(self.dataframe, screen_width=60)
+        dtp.config.chunk_size = 7
+        screen_width, widths, grid = dtp.fit_screen()
+
+        expected = io.StringIO()
+        tp.banner(dtp.config.banner, width=screen_width, out=expected)
+        tp.table(grid, grid.headers, width=widths, out=expected)
+        self.assertEqual(dtp.render(), expected.getvalue())
+
+    def test_write_async(self):
+        """
+        write_async sends the rendered table to the stream writer,
+        draining as it goes
+        """
+        dtp = DynamicTablePrint(self.dataframe, screen_width=60)
+        dtp.config.chunk_size = 10
+        writer = mock.MagicMock()
+        writer.drain = mock.AsyncMock()
+
+        asyncio.run(dtp.write_async(writer))
+
+        written = b''.join(call.args[0] for call in writer.write.call_args_list)
+        self.assertEqual(written.decode('utf-8'), dtp.render())
+        self.assertEqual(writer.drain.await_count, 1 + 3 + 1)
+
+    def test_write_to_file(self):
+        """
+        Files hold the same table render gives, compressed as asked
+        """
+        dtp = DynamicTablePrint(self.dataframe, screen_width=60)
+        dtp.config.chunk_size = 7
+        expected = dtp.render()
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name, opener in [('table.txt', open),
+                                 ('table.txt.gz', gzip.open),
+                                 ('table.txt.xz', lzma.open)]:
+                path = os.path.join(directory, name)
+                dtp.write_to_file(path)
+                with opener(path, 'rt', encoding='utf-8') as written:
+                    self.assertEqual(written.read(), expected)
+
+        binary = io.BytesIO()
+        dtp.write_to_file(binary, compression='gzip')
+        self.assertEqual(gzip.decompress(binary.getvalue()).decode('utf-8'),
+                         expected)
+
+        text = io.StringIO()
+        dtp.write_to_file(text)
+        self.assertEqual(text.getvalue(), expected)
+
+        with self.assertRaises(ValueError):
+            dtp.write_to_file(io.BytesIO(), compression='zip')
+
+    def test_write_to_file_squishes_in_blocks(self):
+        """
+        Only one block of rows is squished at a time
+        """
+        dtp = DynamicTablePrint(self.dataframe, screen_width=60)
+        dtp.config.chunk_size = 7
+        grids = []
+
+        class RecordingSquisher(dtp.squisher):
+            def squish_to_grid(self, start=None, stop=None):
+                grid = super().squish_to_grid(start, stop)
+                grids.append(grid)
+                return grid
+
+        dtp.squisher = RecordingSquisher
+        dtp.write_to_file(io.StringIO())
+        self.assertEqual([len(grid) for grid in grids], [7, 7, 7, 7, 2])
+
+    def test_measuring_memory_flat(self):
+        """
+        Columns are measured a chunk at a time, so measuring more rows
+        does not take more memory
+        """
+        def peak(rows):
+            dataframe = pd.DataFrame({
+                'ratio': [i + 0.5 for i in range(rows)],
+                'labels': pd.Series([i / 4 for i in range(rows)], dtype=object),
+            })
+            dtp = DynamicTablePrint(dataframe, screen_width=60)
+            tracemalloc.start()
+            dtp.fit_columns()
+            measured = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return measured
+
+        self.assertLess(peak(80000), 2 * peak(20000))
+
+    def test_top_n(self):
+        """
+        top_n keeps the largest rows by sort_by, in order
+        """
+        dataframe = pd.DataFrame({
+            'host': ["host-%d" % i for i in range(100)],
+            'latency': [(i * 37) % 100 for i in range(100)],
+        })
+        dtp = DynamicTablePrint(dataframe, sort_by='latency', top_n=5)
+        self.assertEqual(dtp.data_frame['latency'].tolist(), [99, 98, 97, 96, 95])
+        self.assertEqual(dtp.data_frame.index.tolist(), list(range(5)))
+
+        dtp = DynamicTablePrint(dataframe, sort_by='latency', top_n=3,
+                                ascending=True)
+        self.assertEqual(dtp.data_frame['latency'].tolist(), [0, 1, 2])
+
+        dtp = DynamicTablePrint(dataframe, sort_by='host', top_n=2)
+        self.assertEqual(dtp.data_frame['host'].tolist(), ['host-99', 'host-98'])
+
+        dtp = DynamicTablePrint(dataframe, top_n=2)
+        self.assertEqual(dtp.data_frame['host'].tolist(), ['host-0', 'host-1'])
+
+    def test_measure_all(self):
+        """
+        Widths come from the printed rows unless measure_all
+        """
+        dataframe = pd.DataFrame({
+            'name': ['a' * 40] + ['b'] * 9,
+            'rank': list(range(10)),
+        })
+        selected = DynamicTablePrint(dataframe, sort_by='rank', top_n=3)
+        self.assertEqual(selected.fit_columns(), {'name': 4, 'rank': 4})
+
+        measured = DynamicTablePrint(dataframe, sort_by='rank', top_n=3,
+                                     measure_all=True, screen_width=100)
+        self.assertEqual(measured.fit_columns(), {'name': 40, 'rank': 4})
+
     def test_set_index(self):
         """
         check to see that the index has been fixed during initialization
@@ -0,0 +1,67 @@
+"""
+Tests the compact squished grid
+"""
+
+import unittest
+import pandas as pd
+
+from dynamictableprint.grid import SquishedGrid
+from dynamictableprint.squisher import DataFrameSquisher
+
+class TestSquishedGrid(unittest.TestCase):
+    """
+    Tests the SquishedGrid
+    """
+    def setUp(self):
+        length = 30
+        raw_data = {
+            'short': ["A"*2 for i in range(length)],
+            'long': ["GARBAGE"*4 for i in range(length)],
+            'numbers': [i * 1.5 for i in range(length)],
+        }
+        self.dataframe = pd.DataFrame(raw_data, columns=[*raw_data])
+        self.requested_column_size = {'short': 5, 'long': 10, 'numbers': 2}
+        self.squisher = DataFrameSquisher(
+            self.requested_column_size,
+            self.dataframe,
+        )
+
+    def test_grid_matches_squish_to(self):
+        """
+        The column-wise squish gives the same cells as the per-cell one
+        """
+        grid = self.squisher.squish_to_grid()
+        for index, column in enumerate(self.dataframe.columns):
+            ideal_length = self.requested_column_size[column]
+            expected = [self.squisher._squish_to(value, ideal_length)
+                        for value in self.dataframe[column]]
+            self.assertEqual(grid.columns[index].tolist(), expected)
+
+    def test_grid_sized_from_widths(self):
+        """
+        Each column buffer is exactly as wide as requested
+        """
+        squisher = DataFrameSquisher(self.requested_column_size,
+                                     self.dataframe.astype(object))
+        grid = squisher.squish_to_grid()
+        self.assertEqual(grid.widths, (5, 10, 2))
+        self.assertEqual(grid.nbytes, 30 * (5 + 10 + 2) * 4)
+
+    def test_grid_rows(self):
+        """
+        The grid reads as rows, the way the renderer wants it
+        """
+        grid = self.squisher.squish_to_grid()
+        self.assertEqual(len(grid), 30)
+        self.assertEqual(grid.headers, ['short', 'long', 'n.'])
+        self.assertEqual(grid[0], ('AA', 'GARBAGE...', '0.'))
+        self.assertEqual(len(list(grid)), 30)
+
+    def test_empty_grid(self):
+        """
+        A grid without columns has no rows
+        """
+        self.assertEqual(len(SquishedGrid([], [])), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Tests the logging handlers
+"""
+
+import io
+import logging
+import logging.handlers
+import os
+import queue
+import subprocess
+import sys
+import unittest
+import pandas as pd
+
+from dynamictableprint.dynamicprinter import DynamicTablePrint
+from dynamictableprint.handlers import DynamicTableHandler, DynamicTableQueueHandler
+
+class TestDynamicTableHandler(unittest.TestCase):
+    """
+    Tests the DynamicTableHandler and DynamicTableQueueHandler
+    """
+    def setUp(self):
+        self.dataframe = pd.DataFrame({
+            'host': ["server-%d" % i for i in range(10)],
+            'latency': [i * 10 for i in range(10)],
+        })
+        self.stream = io.StringIO()
+        self.handler = DynamicTableHandler(self.stream, screen_width=40)
+        self.logger = logging.getLogger('dynamictableprint.tests')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        self.logger.handlers = []
+        self.handler.close()
+
+    def expected_table(self, banner):
+        table = DynamicTablePrint(self.dataframe, screen_width=40)
+        table.config.banner = banner
+        return table.render()
+
+    def test_dataframe_payloads(self):
+        """
+        DataFrames, as the message or through extra, print as tables
+        while other records print as lines
+        """
+        self.logger.addHandler(self.handler)
+        self.logger.info('before')
+        self.logger.info(self.dataframe)
+        self.logger.info('latencies', extra={'dataframe': self.dataframe})
+        self.handler.flush()
+
+        self.assertEqual(
+            self.stream.getvalue(),
+            'before\n'
+            + self.expected_table('dynamictableprint.tests')
+            + self.expected_table('latencies'))
+
+    def test_close_writes_queued_records(self):
+        """
+        Nothing queued is lost when the handler is closed
+        """
+        self.logger.addHandler(self.handler)
+        for index in range(100):
+            self.logger.info('line %d', index)
+        self.handler.close()
+
+        lines = self.stream.getvalue().splitlines()
+        self.assertEqual(lines, ['line %d' % index for index in range(100)])
+
+    def test_queue_handler_keeps_dataframe(self):
+        """
+        Records travel through a queue with their DataFrame intact
+        """
+        records = queue.Queue()
+        self.logger.addHandler(DynamicTableQueueHandler(records))
+        listener = logging.handlers.QueueListener(records, self.handler)
+        listener.start()
+        self.logger.info('latencies', extra={'dataframe': self.dataframe})
+        listener.stop()
+        self.handler.flush()
+
+        self.assertEqual(self.stream.getvalue(),
+                         self.expected_table('latencies'))
+
+    def test_tracebacks_follow_the_table(self):
+        """
+        A traceback is written after the table rather than inside its
+        banner, including when the record went through a queue
+        """
+        records = queue.Queue()
+        queue_handler = DynamicTableQueueHandler(records)
+        listener = logging.handlers.QueueListener(records, self.handler)
+        listener.start()
+
+        for handler in (self.handler, queue_handler):
+            self.logger.handlers = [handler]
+            try:
+                raise ValueError('bad latency')
+            except ValueError:
+                self.logger.exception('latencies',
+                                      extra={'dataframe': self.dataframe})
+        listener.stop()
+        self.handler.flush()
+
+        table = self.expected_table('latencies')
+        output = self.stream.getvalue()
+        self.assertEqual(output.count(table), 2)
+
+        tracebacks = [text for text in output.split(table) if text]
+        self.assertEqual(len(tracebacks), 2)
+        for traceback in tracebacks:
+            self.assertTrue(traceback.startswith('Traceback'))
+            self.assertTrue(traceback.endswith('ValueError: bad latency\n'))
+
+    def run_script(self, handler_arguments, frames):
+        """
+        The output of a script which logs frames through a handler and
+        exits without closing it, leaving that to logging.shutdown
+        """
+        script = (
+            'import logging, sys\n'
+            'import pandas as pd\n'
+            'from dynamictableprint.handlers import DynamicTableHandler\n'
+            'handler = DynamicTableHandler(sys.stdout, {})\n'
+            "logger = logging.getLogger('tables')\n"
+            'logger.addHandler(handler)\n'
+            'frame = pd.DataFrame({{"n": range(2000)}})\n'
+            'for index in range({}):\n'
+            "    logger.error('frame %d', index, extra={{'dataframe': frame}})\n"
+        ).format(handler_arguments, frames)
+        return subprocess.run(
+            [sys.executable, '-c', script], check=True, capture_output=True,
+            text=True, timeout=60,
+            cwd=os.path.dirname(os.path.dirname(__file__))).stdout
+
+    def test_shutdown_writes_pending_records(self):
+        """
+        logging.shutdown at exit writes out queued records instead of
+        waiting for ever on the worker
+        """
+        output = self.run_script('screen_width=40', 3)
+        self.assertEqual(
+            [line.strip('│ ') for line in output.splitlines()
+             if 'frame' in line], ['frame 0', 'frame 1', 'frame 2'])
+
+    def test_full_queue_does_not_deadlock(self):
+        """
+        Logging into a full queue waits for the worker rather than
+        blocking it
+        """
+        output = self.run_script('max_queued=4, batch_size=2', 40)
+        self.assertEqual(output.count('frame'), 40)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Tests the persistent cache
+"""
+
+import contextlib
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import pandas as pd
+
+from dynamictableprint import dynamicprinter, persistent
+from dynamictableprint.dynamicprinter import DynamicTablePrint
+from dynamictableprint.persistent import PersistentCache
+from dynamictableprint.utils import max_column_width, measured_cheaply
+
+class TestPersistentCache(unittest.TestCase):
+    """
+    Tests the PersistentCache and its use by DynamicTablePrint
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = PersistentCache(self.directory.name)
+
+        length = 30
+        self.dataframe = pd.DataFrame({
+            'something_good': ["FOOD"*2 for i in range(length)],
+            'something_bad': ["WORK"*20 for i in range(length)],
+            'numbers': [i * 1.5 for i in range(length)],
+        })
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @contextlib.contextmanager
+    def measured(self):
+        """
+        Yields a function giving the names of the columns measured so far.
+        Only columns cheaper to measure than to fingerprint may be
+        """
+        with mock.patch.object(dynamicprinter, 'max_column_width',
+                               wraps=max_column_width) as measure:
+            yield lambda: [call.args[0].name
+                           for call in measure.call_args_list]
+
+        for call in measure.call_args_list:
+            self.assertTrue(measured_cheaply(call.args[0]))
+
+    def entries(self):
+        return [name for name in os.listdir(self.directory.name)
+                if name.endswith('.json')]
+
+    def test_round_trip(self):
+        """
+        Values come back from a fresh cache over the same directory
+        """
+        self.store.put(('layout', ['a'], 80), [1, 2, 3])
+        fresh = PersistentCache(self.directory.name)
+        self.assertEqual(fresh.get(('layout', ['a'], 80)), [1, 2, 3])
+        self.assertIsNone(fresh.get(('layout', ['a'], 81)))
+        self.assertFalse([name for name in os.listdir(self.directory.name)
+                          if name.endswith('.tmp')])
+
+    def test_eviction_by_age(self):
+        """
+        Entries older than max_age are dropped
+        """
+        self.store.put('old', 1)
+        path = os.path.join(self.directory.name, self.entries()[0])
+        an_hour_ago = time.time() - 3600
+        os.utime(path, (an_hour_ago, an_hour_ago))
+
+        store = PersistentCache(self.directory.name, max_age=60)
+        self.assertIsNone(store.get('old'))
+        self.assertEqual(self.entries(), [])
+
+    def test_eviction_by_size(self):
+        """
+        The least recently used entries go once over max_bytes
+        """
+        self.store.put('one', 'x' * 100)
+        size = os.path.getsize(
+            os.path.join(self.directory.name, self.entries()[0]))
+        store = PersistentCache(self.directory.name, max_bytes=size * 2)
+
+        path = os.path.join(self.directory.name, self.entries()[0])
+        an_hour_ago = time.time() - 3600
+        os.utime(path, (an_hour_ago, an_hour_ago))
+
+        store.put('two', 'y' * 100)
+        store.put('six', 'z' * 100)
+        self.assertIsNone(store.get('one'))
+        self.assertEqual(store.get('six'), 'z' * 100)
+        self.assertEqual(len(self.entries()), 2)
+
+    def test_warm_run_skips_measurement(self):
+        """
+        A second run over the same data finds its layout on disk
+        """
+        cold = DynamicTablePrint(self.dataframe, screen_width=50,
+                                 persistent_cache=self.store)
+        expected = cold.render()
+
+        with self.measured() as measured:
+            warm = DynamicTablePrint(self.dataframe.copy(), screen_width=50,
+                                     persistent_cache=self.store)
+            self.assertEqual(warm.render(), expected)
+            self.assertNotIn('numbers', measured())
+
+        self.assertEqual(
+            DynamicTablePrint(self.dataframe, screen_width=50).render(),
+            expected)
+
+    def test_new_screen_width_reuses_measurements(self):
+        """
+        A different screen width needs a new layout, but not new
+        measurements
+        """
+        DynamicTablePrint(self.dataframe, screen_width=50,
+                          persistent_cache=self.store).fit_columns()
+
+        with self.measured() as measured:
+            wider = DynamicTablePrint(self.dataframe, screen_width=70,
+                                      persistent_cache=self.store)
+            self.assertEqual(
+                wider.fit_columns(),
+                DynamicTablePrint(self.dataframe, screen_width=70).fit_columns())
+            self.assertNotIn('numbers', measured())
+
+    def test_cold_run_scans_once(self):
+        """
+        Storing every column's width scans the directory once, not once
+        per entry
+        """
+        with mock.patch.object(persistent.glob, 'glob',
+                               wraps=persistent.glob.glob) as scan:
+            DynamicTablePrint(self.dataframe.astype(object), screen_width=50,
+                              persistent_cache=self.store).fit_columns()
+
+        self.assertEqual(len(self.entries()), 4)
+        self.assertEqual(scan.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Tests the render planner
+"""
+
+import unittest
+import pandas as pd
+
+from dynamictableprint import arrow
+from dynamictableprint.dynamicprinter import DynamicTablePrint
+from dynamictableprint.planner import RenderPlanner
+
+class TestRenderPlanner(unittest.TestCase):
+    """
+    Tests the RenderPlanner and its use by DynamicTablePrint
+    """
+    def setUp(self):
+        length = 50000
+        self.dataframe = pd.DataFrame({
+            'names': ["NAME %d" % i for i in range(length)],
+            'numbers': [i * 1.5 for i in range(length)],
+            'flags': [i % 3 == 0 for i in range(length)],
+        })
+
+    def test_small_frames_render_exactly(self):
+        """
+        A small frame is measured exactly and rendered in full
+        """
+        plan = RenderPlanner(0.05).plan(self.dataframe.head(5))
+        self.assertEqual(plan.measure, 'exact')
+        self.assertEqual(plan.squish, 'serial')
+        self.assertFalse(plan.viewport)
+        self.assertEqual(plan.rows, 5)
+
+    def test_no_budget_renders_everything(self):
+        """
+        Without a budget nothing is cut short
+        """
+        plan = RenderPlanner(None).plan(self.dataframe)
+        self.assertEqual(plan.measure, 'exact')
+        self.assertEqual(plan.rows, len(self.dataframe))
+
+    def test_large_frames_fit_the_budget(self):
+        """
+        A large frame is sampled and cut to a viewport within budget
+        """
+        planner = RenderPlanner(0.05)
+        planner.min_sample_size = 100
+        plan = planner.plan(self.dataframe)
+        self.assertEqual(plan.measure, 'sampled')
+        self.assertTrue(plan.viewport)
+        self.assertLess(plan.sample_size, len(self.dataframe))
+        self.assertLessEqual(plan.estimated_seconds, 0.05 + 1e-9)
+        self.assertIn('viewport', plan.describe())
+
+    @unittest.skipUnless(arrow.available(), 'pyarrow is not installed')
+    def test_parallel_squishing(self):
+        """
+        Threads are used once squishing Arrow-backed strings is costly
+        enough, one per Arrow-backed column at most
+        """
+        dataframe = self.dataframe.assign(
+            names=self.dataframe['names'].astype('string[pyarrow]'),
+            labels=self.dataframe['names'].astype('string[pyarrow]'),
+        )
+        plan = RenderPlanner(10.0, workers=4).plan(dataframe)
+        self.assertEqual(plan.squish, 'parallel')
+        self.assertEqual(plan.workers, 2)
+
+    def test_python_squishing_stays_serial(self):
+        """
+        Columns squished through str() hold the GIL, so get no threads
+        """
+        dataframe = self.dataframe.assign(
+            names=self.dataframe['names'].astype(object),
+            labels=self.dataframe['names'].astype(object),
+        )
+        plan = RenderPlanner(10.0, workers=4).plan(dataframe)
+        self.assertEqual(plan.squish, 'serial')
+
+    def test_viewport_render(self):
+        """
+        A viewport prints its rows, then says how many were left out
+        """
+        dtp = DynamicTablePrint(self.dataframe, screen_width=60, budget=0.01)
+        plan = dtp.plan()
+        self.assertIs(dtp.render_plan, plan)
+
+        lines = dtp.render().splitlines()
+        self.assertEqual(len(lines), 3 + 3 + plan.rows + 1 + 3)
+        self.assertIn('%d more rows' % (len(self.dataframe) - plan.rows),
+                      lines[-2])
+
+    def test_parallel_render_matches_serial(self):
+        """
+        Squishing on threads gives the same table
+        """
+        dataframe = self.dataframe.head(500)
+        serial = DynamicTablePrint(dataframe, screen_width=40)
+        parallel = DynamicTablePrint(dataframe, screen_width=40)
+        parallel.render_plan = parallel.plan()._replace(workers=3)
+        self.assertEqual(parallel.render(), serial.render())
+
+    @unittest.skipUnless(arrow.available(), 'pyarrow is not installed')
+    def test_parallel_arrow_render_matches_serial(self):
+        """
+        Squishing Arrow-backed columns on threads, and the rest on the
+        calling thread, gives the same table
+        """
+        dataframe = self.dataframe.head(500)
+        dataframe = dataframe.assign(
+            labels=dataframe['names'].astype('string[pyarrow]'))
+        serial = DynamicTablePrint(dataframe, screen_width=40)
+        parallel = DynamicTablePrint(dataframe, screen_width=40)
+        parallel.render_plan = parallel.plan()._replace(workers=3)
+        self.assertEqual(parallel.render(), serial.render())
+
+if __name__ == '__main__':
+    unittest.main()
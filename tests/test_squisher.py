@@ -4,8 +4,10 @@ Tests the squisher
 
 import unittest
 import copy
+import tracemalloc
 import pandas as pd
 
+from dynamictableprint.cache import ColumnCache
 from dynamictableprint.squisher import DataFrameSquisher, SquishCalculator
 from dynamictableprint.utils import max_column_width, max_width_for
 
@@ -108,6 +110,96 @@ class TestDataFrameSquisher(unittest.TestCase):
         self.assertEqual(
             max_width_for(squished_dataframe, 'ab'), 2)
 
+    def test_wrap_to_grid(self):
+        """
+        In wrap mode, long values carry on over extra lines of their row
+        """
+        dataframe = pd.DataFrame({
+            'name': ['abcdefgh', 'ab', 'abcdefghijk'],
+            'n': [1, 22, 333],
+        })
+        df_squisher = DataFrameSquisher({'name': 4, 'n': 3}, dataframe,
+                                        wrap=True)
+        grid = df_squisher.wrap_to_grid()
+        self.assertEqual(grid.row_count, 3)
+        self.assertEqual(grid.columns[0].tolist(),
+                         ['abcd', 'efgh', 'ab', 'abcd', 'efgh', 'ijk'])
+        self.assertEqual(grid.columns[1].tolist(),
+                         ['1', '', '22', '333', '', ''])
+
+    def test_wrap_max_lines(self):
+        """
+        Rows stop at max_lines, ending values cut short with ellipses
+        """
+        dataframe = pd.DataFrame({'name': ['a' * 30, 'b' * 12, 'c']})
+        df_squisher = DataFrameSquisher({'name': 6}, dataframe,
+                                        wrap=True, max_lines=2)
+        grid = df_squisher.squish_to_grid()
+        self.assertEqual(grid.columns[0].tolist(),
+                         ['aaaaaa', 'aaa...', 'bbbbbb', 'bbbbbb', 'c'])
+
+    def test_datetime_columns(self):
+        """
+        Dates, time zones and durations print as pandas prints them,
+        and as wide as they were measured
+        """
+        dataframe = pd.DataFrame({
+            'date': pd.to_datetime(['2020-01-01', None]),
+            'local': pd.to_datetime(['2020-01-01', '2020-06-01']).tz_localize(
+                'US/Eastern'),
+            'duration': pd.to_timedelta([1, None], unit='s'),
+        })
+        widths = {column: max_column_width(dataframe[column])
+                  for column in dataframe.columns}
+        df_squisher = DataFrameSquisher(widths, dataframe)
+
+        for squisher in (df_squisher, DataFrameSquisher(
+                widths, dataframe, cache=ColumnCache())):
+            grid = squisher.squish_to_grid()
+            for index, column in enumerate(dataframe.columns):
+                self.assertEqual(grid.columns[index].tolist(),
+                                 [str(value) for value in dataframe[column]])
+
+        self.assertEqual(grid.columns[0].tolist(), ['2020-01-01 00:00:00', 'NaT'])
+        self.assertEqual(grid.columns[1][0], '2020-01-01 00:00:00-05:00')
+        self.assertEqual(grid.columns[2].tolist(), ['0 days 00:00:01', 'NaT'])
+
+    def test_long_values_not_packed_whole(self):
+        """
+        Values are cut before packing, so no array is as wide as the
+        longest value
+        """
+        dataframe = pd.DataFrame({'text': ['x' * 30] * 99 + ['y' * 10000]},
+                                 dtype=object)
+        df_squisher = DataFrameSquisher({'text': 35}, dataframe)
+
+        tracemalloc.start()
+        grid = df_squisher.squish_to_grid()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertEqual(grid.columns[0][-1], 'y' * 32 + '...')
+        self.assertLess(peak, 100 * 10000 * 4)
+
+    def test_wrap_cuts_before_packing(self):
+        """
+        With max_lines, wrapped values are cut to the lines they can
+        fill before being packed
+        """
+        dataframe = pd.DataFrame({'text': ['x' * 30] * 99 + ['y' * 10000]},
+                                 dtype=object)
+        df_squisher = DataFrameSquisher({'text': 10}, dataframe,
+                                        wrap=True, max_lines=3)
+
+        tracemalloc.start()
+        grid = df_squisher.squish_to_grid()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertEqual(grid.columns[0][-3:].tolist(),
+                         ['y' * 10, 'y' * 10, 'y' * 7 + '...'])
+        self.assertLess(peak, 100 * 10000 * 4)
+
 class TestSquishCalculator(unittest.TestCase):
     """
     Tests the SquishCalculator
@@ -0,0 +1,164 @@
+"""
+Tests the table protocol and its adapters
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+from dynamictableprint import arrow
+from dynamictableprint.dynamicprinter import DynamicTablePrint
+from dynamictableprint.table import ColumnTable, as_table, select_rows
+
+class TestColumnTable(unittest.TestCase):
+    """
+    Tests the ColumnTable and the adapters onto it
+    """
+    def setUp(self):
+        self.records = [
+            {'name': 'Albert Einstein', 'born': 1879, 'field': 'Physics'},
+            {'name': 'Ada Lovelace', 'born': 1815},
+            {'name': 'Alan Turing', 'born': 1912, 'field': 'Computing'},
+        ]
+        self.dataframe = pd.DataFrame(self.records)
+
+    def render(self, data, **kwargs):
+        return DynamicTablePrint(data, screen_width=40, **kwargs).render()
+
+    def test_records(self):
+        """
+        Lists of dicts print like the DataFrame built from them
+        """
+        table = as_table(self.records)
+        self.assertIsInstance(table, ColumnTable)
+        self.assertEqual(table.columns, ['name', 'born', 'field'])
+        self.assertEqual(table['field'].tolist(), ['Physics', None, 'Computing'])
+
+        expected = self.render(self.dataframe.fillna({'field': 'None'}))
+        self.assertEqual(self.render(self.records), expected)
+
+    def test_column_dicts(self):
+        """
+        Dicts of columns print like a DataFrame
+        """
+        columns = {'a': [1, 22, 333], 'b': ['x' * 50, 'y', 'z']}
+        self.assertEqual(self.render(columns),
+                         self.render(pd.DataFrame(columns)))
+
+        with self.assertRaises(ValueError):
+            ColumnTable({'a': [1, 2], 'b': [1]})
+
+    def test_structured_arrays(self):
+        """
+        The fields of a structured array are viewed, not copied
+        """
+        array = np.array([(1, 2.5), (20, -3.0)],
+                         dtype=[('count', 'i8'), ('value', 'f8')])
+        table = as_table(array)
+        self.assertTrue(np.shares_memory(table['count'], array))
+        self.assertEqual(
+            self.render(array),
+            self.render(pd.DataFrame({'count': [1, 20], 'value': [2.5, -3.0]})))
+
+    def test_dataframes_pass_through(self):
+        """
+        A DataFrame already follows the protocol
+        """
+        self.assertIs(as_table(self.dataframe), self.dataframe)
+        with self.assertRaises(TypeError):
+            as_table(42)
+
+    def test_empty(self):
+        """
+        Tables without rows print the empty banner
+        """
+        dtp = DynamicTablePrint({'a': []})
+        self.assertIn(dtp.config.empty_banner, dtp.render())
+
+    def test_records_need_neither_pandas_nor_pyarrow(self):
+        """
+        Printing records imports neither pandas nor pyarrow
+        """
+        script = (
+            'import sys\n'
+            'from dynamictableprint import DynamicTablePrint\n'
+            "DynamicTablePrint([{'a': 1}, {'a': 2}], budget=1).render()\n"
+            "print('pandas' in sys.modules, 'pyarrow' in sys.modules)\n")
+        output = subprocess.run(
+            [sys.executable, '-c', script], check=True, capture_output=True,
+            text=True, cwd=os.path.dirname(os.path.dirname(__file__))).stdout
+        self.assertEqual(output.split(), ['False', 'False'])
+
+    def test_select_rows(self):
+        """
+        Sorting and top_n without pandas agree with pandas
+        """
+        latency = [5, 3, 9, 3, 7, 1, 9]
+        table = ColumnTable({'latency': np.array(latency),
+                             'row': np.arange(len(latency))})
+        dataframe = pd.DataFrame({'latency': latency,
+                                  'row': range(len(latency))})
+
+        for top_n in [None, 1, 3, 7]:
+            for ascending in [True, False]:
+                selected = select_rows(table, 'latency', top_n, ascending)
+                expected = DynamicTablePrint(
+                    dataframe, sort_by='latency', top_n=top_n,
+                    ascending=ascending).data_frame
+                self.assertEqual(selected['row'].tolist(),
+                                 expected['row'].tolist())
+
+    def test_select_rows_missing_last(self):
+        """
+        None and NaN keys come last in either direction, as with pandas,
+        whether the table came from records or a structured array
+        """
+        keys = [
+            [2.0, float('nan'), 5.0, 1.0],
+            [3, None, 1, 3, 7],
+            [float('nan'), 'b', None, 'a'],
+        ]
+        for key in keys:
+            records = [{'key': value, 'row': row}
+                       for row, value in enumerate(key)]
+            tables = [as_table(records)]
+            if all(isinstance(value, float) for value in key):
+                tables.append(as_table(np.array(
+                    [(value, row) for row, value in enumerate(key)],
+                    dtype=[('key', 'f8'), ('row', 'i8')])))
+
+            dataframe = pd.DataFrame(records)
+            for table in tables:
+                for top_n in [None, 1, 2, len(key), len(key) + 1]:
+                    for ascending in [True, False]:
+                        selected = select_rows(table, 'key', top_n, ascending)
+                        expected = dataframe.sort_values(
+                            'key', ascending=ascending, kind='stable',
+                            na_position='last').head(top_n)
+                        self.assertEqual(selected['row'].tolist(),
+                                         expected['row'].tolist())
+
+    def test_records_infer_dtypes(self):
+        """
+        Record columns of a single numeric type get that dtype, others
+        stay objects so missing values still print as None
+        """
+        table = as_table([{'a': 1, 'b': 1.5, 'c': True, 'd': 1},
+                          {'a': 2, 'b': 2.5, 'c': False, 'd': None}])
+        self.assertEqual([dtype.kind for dtype in table.dtypes],
+                         ['i', 'f', 'b', 'O'])
+
+    @unittest.skipUnless(arrow.available(), 'pyarrow is not installed')
+    def test_arrow_tables(self):
+        """
+        pyarrow Tables print like the DataFrame converted from them
+        """
+        import pyarrow # pylint: disable=import-outside-toplevel
+        table = pyarrow.table({'name': ['a' * 30, 'b'], 'count': [1, 2]})
+        self.assertEqual(self.render(table), self.render(table.to_pandas()))
+
+if __name__ == '__main__':
+    unittest.main()
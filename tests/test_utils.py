@@ -3,9 +3,11 @@ Tests utils
 """
 
 import unittest
+import warnings
+import numpy as np
 import pandas as pd
 
-from dynamictableprint.utils import max_width_for
+from dynamictableprint.utils import max_width_for, numeric_column_width
 
 class TestPublicFunctions(unittest.TestCase):
     """
@@ -38,5 +40,42 @@ class TestPublicFunctions(unittest.TestCase):
         max_length = max_width_for(self.dataframe, 'data_name_longer')
         self.assertEqual(max_length, 20)
 
+    def test_numeric_column_width_matches_str(self):
+        """
+        #numeric_column_width gives the width str() would have printed
+        """
+        columns = [
+            pd.Series([0, 7, 12345]),
+            pd.Series([-100000, 5, 99]),
+            pd.Series(np.array([3, 250], dtype=np.uint8)),
+            pd.Series([0.1 + 0.2, 1e16, -2.5, 1e-7]),
+            pd.Series([1.5, float('nan'), float('-inf')]),
+            pd.Series(np.array([0.1, 12.75], dtype=np.float32)),
+            pd.Series(np.array([60000.0, -2.0], dtype=np.float16)),
+            pd.Series(np.array([60000.0, 0.1], dtype=np.float16)),
+            pd.Series([1.0, -250.0, 3.0]),
+            pd.Series([-0.0, 1.0]),
+            pd.Series([9999999999999998.0, 1e16]),
+            pd.Series([float('nan'), float('nan')]),
+            pd.Series([True, True]),
+            pd.Series([True, False]),
+            pd.Series([1, None, -30], dtype='Int64'),
+            pd.Series([None, None], dtype='Float64'),
+            pd.Series([True, None], dtype='boolean'),
+        ]
+        for column in columns:
+            expected = max(len(str(value))
+                           for value in np.asarray(column.values, dtype=object))
+            with warnings.catch_warnings():
+                warnings.simplefilter('error')
+                self.assertEqual(numeric_column_width(column), expected)
+
+    def test_numeric_column_width_skips_other_columns(self):
+        """
+        Non-numeric and empty columns are left to the general path
+        """
+        self.assertIsNone(numeric_column_width(self.dataframe['data_name_longer']))
+        self.assertIsNone(numeric_column_width(pd.Series([], dtype='int64')))
+
 if __name__ == '__main__':
     unittest.main()
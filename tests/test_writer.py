@@ -0,0 +1,56 @@
+"""
+Tests the shared stream writer
+"""
+
+import io
+import threading
+import unittest
+import pandas as pd
+
+from dynamictableprint.dynamicprinter import DynamicTablePrint
+from dynamictableprint.writer import SharedStreamWriter
+
+class TestSharedStreamWriter(unittest.TestCase):
+    """
+    Tests the SharedStreamWriter
+    """
+    def setUp(self):
+        self.tables = []
+        for thread in range(8):
+            dataframe = pd.DataFrame({
+                'thread': [thread for i in range(50)],
+                'status': ["RUNNING"*3 for i in range(50)],
+            })
+            dtp = DynamicTablePrint(dataframe, screen_width=30)
+            dtp.config.banner = 'Thread %d' % thread
+            self.tables.append(dtp)
+
+    def test_tables_do_not_interleave(self):
+        """
+        Every table written from a thread lands in the stream whole
+        """
+        stream = io.StringIO()
+        writer = SharedStreamWriter(stream)
+        threads = [threading.Thread(target=writer.write, args=(table,))
+                   for table in self.tables]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        output = stream.getvalue()
+        rendered = [table.render() for table in self.tables]
+        for text in rendered:
+            self.assertIn(text, output)
+        self.assertEqual(len(output), sum(len(text) for text in rendered))
+
+    def test_writes_rendered_strings(self):
+        """
+        Already rendered tables are passed straight through
+        """
+        stream = io.StringIO()
+        SharedStreamWriter(stream).write('done\n')
+        self.assertEqual(stream.getvalue(), 'done\n')
+
+if __name__ == '__main__':
+    unittest.main()